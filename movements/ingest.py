@@ -0,0 +1,122 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from products.models import Product
+from supplies.models import Supplies
+from stats.rollup import apply_movements
+from .models import ProductMovement, SupplyMovement
+
+# tipo_movimiento -> (modelo de movimiento, modelo del ítem, campo del ítem,
+# clave del nombre en el payload, error si el ítem no existe)
+MOVEMENT_TARGETS = {
+    "productos": (ProductMovement, Product, "product", "product_name", "Producto no encontrado"),
+    "insumos": (SupplyMovement, Supplies, "supply", "supply_name", "Insumo no encontrado"),
+}
+
+BULK_MAX_MOVEMENTS = 50000
+# Tamaño de los lotes de nombres en los IN y de los INSERT masivos
+INGEST_BATCH_SIZE = 2000
+
+MODIFICATION_TYPE_MAX_LENGTH = ProductMovement._meta.get_field('modificationType').max_length
+COMENTARY_MAX_LENGTH = ProductMovement._meta.get_field('comentary').max_length
+
+
+def _chunks(values, size=INGEST_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _resolve_by_name(queryset, field, names):
+    """
+    Resuelve nombres a objetos con una consulta IN por lote. Ante nombres
+    repetidos gana el de menor id, igual que .first() en create_movement.
+    """
+    resolved = {}
+    for chunk in _chunks(names):
+        for obj in queryset.filter(**{f"{field}__in": chunk}).order_by('id'):
+            resolved.setdefault(getattr(obj, field), obj)
+    return resolved
+
+
+def _validate_entry(entry, name_key):
+    if not isinstance(entry, dict):
+        return "Elemento inválido"
+    if not entry.get("user") or not entry.get(name_key):
+        return f"Faltan 'user' o '{name_key}'"
+    if not isinstance(entry["user"], str) or not isinstance(entry[name_key], str):
+        return f"'user' y '{name_key}' deben ser texto"
+    modification_type = entry.get("modificationType")
+    if not modification_type or not entry.get("modifiedStock"):
+        return "Faltan campos obligatorios"
+    if len(str(modification_type)) > MODIFICATION_TYPE_MAX_LENGTH:
+        return f"modificationType no puede superar {MODIFICATION_TYPE_MAX_LENGTH} caracteres"
+    try:
+        modified_stock = int(entry["modifiedStock"])
+    except (TypeError, ValueError):
+        return "modifiedStock debe ser un entero"
+    if modified_stock < 0:
+        return "modifiedStock no puede ser negativo"
+    comentary = entry.get("comentary")
+    if comentary is not None and len(str(comentary)) > COMENTARY_MAX_LENGTH:
+        return f"El comentario no puede superar {COMENTARY_MAX_LENGTH} caracteres"
+    return None
+
+
+def ingest_movements(tipo_movimiento, entries):
+    """
+    Crea en bloque los movimientos de entries (mismo formato que
+    create_movement). Usuarios e ítems se resuelven con una consulta IN por
+    lote, la validación se hace en una pasada sobre la lista y la inserción
+    con bulk_create, todo en una transacción.
+
+    Los elementos inválidos no se insertan; devuelve (creados, errores) donde
+    errores es una lista de {index, error}.
+    """
+    MovementModel, ItemModel, item_field, name_key, not_found = MOVEMENT_TARGETS[tipo_movimiento]
+
+    errors = []
+    valid = []
+    for index, entry in enumerate(entries):
+        error = _validate_entry(entry, name_key)
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            valid.append((index, entry))
+
+    users = _resolve_by_name(
+        User.objects.only('id', 'username'), 'username',
+        {entry["user"] for _, entry in valid}
+    )
+    items = _resolve_by_name(
+        ItemModel.objects.only('id', 'name'), 'name',
+        {entry[name_key] for _, entry in valid}
+    )
+
+    movements = []
+    for index, entry in valid:
+        user = users.get(entry["user"])
+        if user is None:
+            errors.append({"index": index, "error": "Usuario no encontrado"})
+            continue
+        item = items.get(entry[name_key])
+        if item is None:
+            errors.append({"index": index, "error": not_found})
+            continue
+        movements.append(MovementModel(
+            user=user,
+            user_name=user.username,
+            modificationType=entry["modificationType"],
+            modifiedStock=int(entry["modifiedStock"]),
+            comentary=entry.get("comentary", ""),
+            **{item_field: item, f"{item_field}_name": item.name}
+        ))
+
+    errors.sort(key=lambda error: error["index"])
+
+    with transaction.atomic():
+        # bulk_create evita el full_clean de Movement.save: los valores ya se validaron arriba
+        MovementModel.objects.bulk_create(movements, batch_size=INGEST_BATCH_SIZE)
+        apply_movements(movements)
+
+    return len(movements), errors
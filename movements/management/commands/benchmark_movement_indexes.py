@@ -0,0 +1,117 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from movements.models import ProductMovement, SupplyMovement
+from products.models import Product
+from supplies.models import Supplies
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra los planes de ejecución de las consultas frecuentes sobre los "
+        "movimientos, sin y con los índices compuestos. Opcionalmente siembra "
+        "movimientos sintéticos antes de medir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', choices=['productos', 'insumos'], default='productos')
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Cantidad de movimientos sintéticos a insertar (ej. 1000000)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['tipo'] == 'productos':
+            Model, Item, item_field = ProductMovement, Product, 'product'
+        else:
+            Model, Item, item_field = SupplyMovement, Supplies, 'supply'
+
+        if options['seed']:
+            self.seed(Model, Item, item_field, options['seed'], options['batch_size'])
+
+        self.analyze(Model)
+
+        with transaction.atomic():
+            self.drop_indexes(Model)
+            self.explain_hot_queries(Model, item_field, "SIN índices compuestos")
+            transaction.set_rollback(True)
+
+        self.explain_hot_queries(Model, item_field, "CON índices compuestos")
+
+    def hot_queries(self, Model, item_field):
+        since = timezone.now() - timedelta(days=30)
+        item_id = Model.objects.filter(status=True).values_list(f'{item_field}_id', flat=True).first()
+        return [
+            ("Listado paginado (list_movements)",
+             Model.objects.filter(status=True).order_by('dateHourCreation', 'id')[:10]),
+            ("Filtro por tipo y fecha",
+             Model.objects.filter(status=True, modificationType='Salida', dateHourCreation__gte=since)
+             .order_by('dateHourCreation', 'id')[:10]),
+            ("Historial de un ítem por tipo",
+             Model.objects.filter(status=True, **{f'{item_field}_id': item_id}, modificationType='Entrada')
+             .order_by('dateHourCreation')[:10]),
+            ("Agrupación por ítem (top-N)",
+             Model.objects.filter(status=True, modificationType='Salida', dateHourCreation__gte=since)
+             .values(f'{item_field}_id').annotate(total=Sum('modifiedStock')).order_by('-total')[:10]),
+            ("Reconstrucción de rollups",
+             Model.objects.filter(status=True).annotate(day=TruncDate('dateHourCreation'))
+             .values('day', f'{item_field}_id', 'modificationType')
+             .annotate(movement_count=Count('id'), quantity=Sum('modifiedStock')).order_by()),
+        ]
+
+    def explain_hot_queries(self, Model, item_field, label):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {Model.__name__}: {label} ==="))
+        for title, qs in self.hot_queries(Model, item_field):
+            self.stdout.write(self.style.MIGRATE_LABEL(f"\n-- {title}"))
+            self.stdout.write(qs.explain())
+
+    def drop_indexes(self, Model):
+        # DROP INDEX es transaccional en PostgreSQL y SQLite: se revierte al salir
+        with connection.cursor() as cursor:
+            for index in Model._meta.indexes:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+
+    def analyze(self, Model):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(Model._meta.db_table)}")
+
+    def seed(self, Model, Item, item_field, total, batch_size):
+        user = User.objects.order_by('id').first()
+        items = list(Item.objects.filter(status=True).values_list('id', 'name')[:500])
+        if user is None or not items:
+            raise CommandError("Se necesita al menos un usuario y un ítem activo para sembrar movimientos.")
+
+        now = timezone.now()
+        inserted = 0
+        while inserted < total:
+            batch = []
+            for _ in range(min(batch_size, total - inserted)):
+                item_id, item_name = random.choice(items)
+                batch.append(Model(
+                    user_id=user.id,
+                    user_name=user.username,
+                    **{f'{item_field}_id': item_id, f'{item_field}_name': item_name},
+                    modificationType=random.choice(('Entrada', 'Salida')),
+                    modifiedStock=random.randint(1, 50),
+                    status=random.random() > 0.05,
+                ))
+            with transaction.atomic():
+                Model.objects.bulk_create(batch)
+                # auto_now_add pisa la fecha en bulk_create: las fechas aleatorias
+                # se escriben después, sin tocar la definición del campo
+                for movement in batch:
+                    movement.dateHourCreation = now - timedelta(minutes=random.randint(0, 2 * 365 * 24 * 60))
+                Model.objects.bulk_update(batch, ['dateHourCreation'], batch_size=500)
+            inserted += len(batch)
+            self.stdout.write(f"Sembrados {inserted}/{total}", ending='\r')
+
+        self.stdout.write(self.style.WARNING(
+            f"\n{total} movimientos sintéticos insertados. Ejecuta rebuild_movement_rollups "
+            "si esta base también sirve estadísticas."
+        ))
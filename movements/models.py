@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.db.models import Q
+from picm_rest import versions
+from picm_rest.versions import VersionedQuerySet
 
 class Movement(models.Model):
     modifiedStock = models.IntegerField(validators=[MinValueValidator(0)]            
@@ -11,6 +14,8 @@ class Movement(models.Model):
     dateHourDeletion = models.DateTimeField(null=True, blank=True)
     comentary = models.CharField(max_length=40, null=True, blank=True)
 
+    objects = VersionedQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
@@ -20,6 +25,7 @@ class Movement(models.Model):
 
 
 class SupplyMovement(Movement):
+    version_table = versions.SUPPLY_MOVEMENTS
 
     user = models.ForeignKey(
         User,
@@ -38,11 +44,33 @@ class SupplyMovement(Movement):
 
     status = models.BooleanField(default=True)
 
+    class Meta:
+        # Índices parciales sobre los movimientos activos (status=True), que son
+        # los únicos que consultan listados, reportes y estadísticas.
+        indexes = [
+            models.Index(
+                fields=['dateHourCreation', 'id'],
+                condition=Q(status=True),
+                name='smov_active_created_idx'
+            ),
+            models.Index(
+                fields=['modificationType', 'dateHourCreation'],
+                condition=Q(status=True),
+                name='smov_active_type_created_idx'
+            ),
+            models.Index(
+                fields=['supply', 'modificationType', 'dateHourCreation'],
+                condition=Q(status=True),
+                name='smov_active_supply_type_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"Movement {self.id} - Supply: {self.supply.name} - Type: {self.modificationType} - Modified Stock: {self.modifiedStock}"
     
 
 class ProductMovement(Movement):
+    version_table = versions.PRODUCT_MOVEMENTS
 
     user = models.ForeignKey(
         User,
@@ -61,5 +89,26 @@ class ProductMovement(Movement):
 
     status = models.BooleanField(default=True)
 
+    class Meta:
+        # Índices parciales sobre los movimientos activos (status=True), que son
+        # los únicos que consultan listados, reportes y estadísticas.
+        indexes = [
+            models.Index(
+                fields=['dateHourCreation', 'id'],
+                condition=Q(status=True),
+                name='pmov_active_created_idx'
+            ),
+            models.Index(
+                fields=['modificationType', 'dateHourCreation'],
+                condition=Q(status=True),
+                name='pmov_active_type_created_idx'
+            ),
+            models.Index(
+                fields=['product', 'modificationType', 'dateHourCreation'],
+                condition=Q(status=True),
+                name='pmov_active_product_type_idx'
+            ),
+        ]
+
     def __str__(self):
         return f"Movement {self.id} - Product: {self.product.name} - Type: {self.modificationType} - Modified Stock: {self.modifiedStock}"
@@ -0,0 +1,148 @@
+from django.db import transaction
+from django.db.models import F
+
+from products.models import Product
+from supplies.models import Supplies
+from stats.rollup import record_movement, apply_movements
+from stats.totals import TOTAL_FIELDS, apply_totals
+from .models import ProductMovement, SupplyMovement
+
+# Modelo de ítem -> (modelo de movimiento, campo del ítem en el movimiento)
+STOCK_MOVEMENTS = {
+    Product: (ProductMovement, 'product'),
+    Supplies: (SupplyMovement, 'supply'),
+}
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def adjust_stock(Model, item_id, delta, user, comentary=None):
+    """
+    Suma delta (positivo: Entrada, negativo: Salida) al stock del ítem con un
+    único UPDATE condicional (stock = stock + delta) y registra el movimiento
+    en la misma transacción. Nunca deja el stock en negativo.
+
+    Devuelve (stock resultante, movimiento). Lanza Model.DoesNotExist si el
+    ítem no existe o está inactivo, e InsufficientStock si no alcanza el stock.
+    """
+    MovementModel, item_field = STOCK_MOVEMENTS[Model]
+
+    with transaction.atomic():
+        items = Model.objects.filter(id=item_id, status=True)
+        guarded = items.filter(stock__gte=-delta) if delta < 0 else items
+        if not guarded.update(stock=F('stock') + delta):
+            if not items.exists():
+                raise Model.DoesNotExist
+            raise InsufficientStock("No hay stock suficiente para realizar la salida")
+
+        # La fila quedó bloqueada por el UPDATE: esta lectura ve nuestro resultado
+        name, stock, price = items.values_list('name', 'stock', TOTAL_FIELDS[Model][0]).get()
+        apply_totals(Model, value=price * delta)
+
+        movement = MovementModel(
+            user=user,
+            user_name=user.username,
+            modificationType='Entrada' if delta >= 0 else 'Salida',
+            modifiedStock=abs(delta),
+            comentary=comentary,
+            **{f'{item_field}_id': item_id, f'{item_field}_name': name}
+        )
+        # bulk_create evita el full_clean de Movement.save: los valores ya se validaron aquí
+        MovementModel.objects.bulk_create([movement])
+        record_movement(movement)
+
+    return stock, movement
+
+
+def set_stock(Model, item_id, stock):
+    """Fija el stock del ítem sin registrar movimiento (ajuste directo)."""
+    with transaction.atomic():
+        items = Model.objects.filter(id=item_id, status=True)
+        previous = items.select_for_update().values_list('stock', TOTAL_FIELDS[Model][0]).first()
+        if previous is None:
+            raise Model.DoesNotExist
+        items.update(stock=stock)
+        previous_stock, price = previous
+        apply_totals(Model, value=price * (stock - previous_stock))
+    return stock
+
+
+BULK_MAX_ITEMS = 1000
+
+
+def _parse_bulk_entry(entry):
+    try:
+        item_id = int(entry['id'])
+        delta = int(entry['delta'])
+    except (KeyError, TypeError, ValueError):
+        return None, "Cada elemento debe tener 'id' y 'delta' enteros"
+    comentary = entry.get('comentary')
+    if comentary is not None and len(str(comentary)) > 40:
+        return None, "El comentario no puede superar 40 caracteres"
+    return (item_id, delta, comentary), None
+
+
+def adjust_stock_bulk(Model, entries, user):
+    """
+    Aplica una lista de ajustes {id, delta, comentary} en una sola
+    transacción: las filas se bloquean y leen con una consulta, el stock se
+    escribe con bulk_update y los movimientos con bulk_create.
+
+    Los elementos inválidos, inexistentes o sin stock suficiente no se aplican
+    y se informan en el resultado; el resto sí. Devuelve una lista de
+    resultados en el mismo orden de entrada.
+    """
+    MovementModel, item_field = STOCK_MOVEMENTS[Model]
+    price_field = TOTAL_FIELDS[Model][0]
+
+    results = []
+    parsed = []
+    for index, entry in enumerate(entries):
+        values, error = _parse_bulk_entry(entry) if isinstance(entry, dict) else (None, "Elemento inválido")
+        results.append({"index": index, "id": entry.get('id') if isinstance(entry, dict) else None})
+        if error:
+            results[index].update({"status": "error", "error": error})
+        else:
+            parsed.append((index, values))
+
+    with transaction.atomic():
+        ids = {item_id for _, (item_id, _, _) in parsed}
+        items = {
+            item.id: item
+            for item in Model.objects.select_for_update().filter(id__in=ids, status=True).only('id', 'name', 'stock', price_field)
+        }
+
+        changed = {}
+        movements = []
+        value_delta = 0
+        for index, (item_id, delta, comentary) in parsed:
+            item = items.get(item_id)
+            if item is None:
+                results[index].update({"status": "error", "error": "No encontrado"})
+                continue
+            if item.stock + delta < 0:
+                results[index].update({"status": "error", "error": "No hay stock suficiente para realizar la salida"})
+                continue
+
+            item.stock += delta
+            value_delta += getattr(item, price_field) * delta
+            changed[item_id] = item
+            movements.append(MovementModel(
+                user=user,
+                user_name=user.username,
+                modificationType='Entrada' if delta >= 0 else 'Salida',
+                modifiedStock=abs(delta),
+                comentary=comentary,
+                **{f'{item_field}_id': item_id, f'{item_field}_name': item.name}
+            ))
+            results[index].update({"status": "ok", "stock": item.stock})
+
+        if changed:
+            Model.objects.bulk_update(changed.values(), ['stock'], batch_size=500)
+            MovementModel.objects.bulk_create(movements, batch_size=500)
+            apply_movements(movements)
+            apply_totals(Model, value=value_delta)
+
+    return results
@@ -1,3 +1,87 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from products.models import Product
+from .models import ProductMovement
+from .stock import adjust_stock, InsufficientStock
+
+
+class AdjustStockConcurrencyTests(TransactionTestCase):
+    """
+    adjust_stock bajo concurrencia real: cada hilo usa su propia conexión, por
+    eso TransactionTestCase (las transacciones deben confirmarse de verdad).
+    """
+
+    THREADS = 8
+    CALLS_PER_THREAD = 25
+    INITIAL_STOCK = 20
+
+    def setUp(self):
+        self.user = User.objects.create_user('stock_tester', password='x')
+        self.product = Product.objects.create(
+            name='Tornillo', description='Tornillo de prueba', price='10.00', stock=self.INITIAL_STOCK
+        )
+
+    def call_with_retry(self, delta):
+        # SQLite serializa las escrituras y puede responder "database is locked";
+        # ese error aborta la transacción completa, así que reintentar es seguro
+        for _ in range(200):
+            try:
+                return adjust_stock(Product, self.product.id, delta, self.user)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                time.sleep(0.01)
+        raise AssertionError("La base de datos siguió bloqueada")
+
+    def test_concurrent_adjustments_lose_no_updates(self):
+        applied = []
+        rejected = []
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def work(thread_number):
+            try:
+                start.wait()
+                for call in range(self.CALLS_PER_THREAD):
+                    # Mezcla de entradas y salidas; las salidas grandes pueden fallar
+                    delta = 3 if (thread_number + call) % 2 else -4
+                    try:
+                        self.call_with_retry(delta)
+                    except InsufficientStock:
+                        with lock:
+                            rejected.append(delta)
+                    else:
+                        with lock:
+                            applied.append(delta)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=(number,)) for number in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(applied) + len(rejected), self.THREADS * self.CALLS_PER_THREAD)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, self.INITIAL_STOCK + sum(applied))
+        self.assertGreaterEqual(self.product.stock, 0)
+        self.assertEqual(ProductMovement.objects.filter(product=self.product).count(), len(applied))
+
+    def test_decrement_larger_than_stock_is_rejected(self):
+        with self.assertRaises(InsufficientStock):
+            adjust_stock(Product, self.product.id, -(self.INITIAL_STOCK + 1), self.user)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, self.INITIAL_STOCK)
+        self.assertFalse(ProductMovement.objects.filter(product=self.product).exists())
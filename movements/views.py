@@ -1,8 +1,10 @@
 from django.shortcuts import render
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework.decorators import api_view  
 from rest_framework.response import Response
 from rest_framework import status
+from picm_rest.conditional import conditional_get
+from picm_rest import versions
 from products.views import update_product_stock ## ADD LATER 
 from supplies.views import update_supply_stock ## ADD LATER
 from .models import ProductMovement
@@ -10,23 +12,46 @@ from .models import SupplyMovement
 from products.models import Product
 from supplies.models import Supplies
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
+from django.http import StreamingHttpResponse
+from stats.rollup import record_movement, discard_movement
+from reports.cache import invalidate_movement_report
+from .ingest import ingest_movements, BULK_MAX_MOVEMENTS
+import copy
+import csv
+import itertools
+import json
+
+MOVEMENTS_ORDERING = ('dateHourCreation', 'id')
+EXPORT_CHUNK_SIZE = 2000
 
 class MovementsPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'limit'
 
-@api_view(['GET'])
-def list_movements(request):
+class MovementsCursorPagination(CursorPagination):
+    # Paginación por cursor (keyset): sin OFFSET ni COUNT(*), cursores opacos next/previous
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = MOVEMENTS_ORDERING
+
+def filter_movements(request):
+    """
+    Aplica los filtros comunes del historial de movimientos (tipo, búsqueda,
+    tipo de modificación y rango de fechas). Devuelve el nombre del campo del
+    ítem ("product" o "supply") y el queryset ordenado de forma estable.
+    """
     tipo = request.GET.get("tipo_movimiento")
 
     if tipo == "productos":
         Model = ProductMovement
-        filter_key = "product__name__icontains"
+        filter_key = "product_name__icontains"
         name_field = "product"
     else:
         Model = SupplyMovement
-        filter_key = "supply__name__icontains"
+        filter_key = "supply_name__icontains"
         name_field = "supply"
 
     filters = {}
@@ -36,27 +61,97 @@ def list_movements(request):
     if fd := request.GET.get('fecha_desde'):   filters['dateHourCreation__gte'] = fd
     if fh := request.GET.get('fecha_hasta'):   filters['dateHourCreation__lte'] = fh
 
-    qs = Model.objects.filter(**filters, status=True)
+    return name_field, Model.objects.filter(**filters, status=True).order_by(*MOVEMENTS_ORDERING)
+
+@api_view(['GET'])
+@conditional_get(versions.PRODUCT_MOVEMENTS, versions.SUPPLY_MOVEMENTS)
+def list_movements(request):
+    name_field, qs = filter_movements(request)
+
+    # Proyección sobre las columnas desnormalizadas: sin JOIN ni cargas perezosas por fila
+    qs = qs.values(
+        "id", f"{name_field}_name", "user_name", "modificationType", "modifiedStock",
+        "comentary", "dateHourCreation", "dateHourUpdate"
+    )
 
-    paginator = MovementsPagination()
+    if request.GET.get('pagination') == 'cursor' or 'cursor' in request.GET:
+        paginator = MovementsCursorPagination()
+    else:
+        paginator = MovementsPagination()
     page = paginator.paginate_queryset(qs, request)               
 
     data = []
     for m in page:
         data.append({
-            "id": m.id,
-            name_field: getattr(m, name_field).name,
-            "user": m.user.username,
-            "modificationType": m.modificationType,
-            "modifiedStock": m.modifiedStock,
-            "comentary": m.comentary,
-            "dateHourCreation": m.dateHourCreation.strftime('%Y/%m/%d') if m.dateHourCreation else '',
-            "dateHourUpdate": m.dateHourUpdate.strftime('%Y/%m/%d') if m.dateHourUpdate else '',
+            "id": m["id"],
+            name_field: m[f"{name_field}_name"],
+            "user": m["user_name"],
+            "modificationType": m["modificationType"],
+            "modifiedStock": m["modifiedStock"],
+            "comentary": m["comentary"],
+            "dateHourCreation": m["dateHourCreation"].strftime('%Y/%m/%d') if m["dateHourCreation"] else '',
+            "dateHourUpdate": m["dateHourUpdate"].strftime('%Y/%m/%d') if m["dateHourUpdate"] else '',
         })
-    print(data)
     return paginator.get_paginated_response(data)
 
+class _Echo:
+    # Pseudo-buffer para csv.writer: devuelve la línea en lugar de escribirla
+    def write(self, value):
+        return value
+
+def _batched(lines, size=EXPORT_CHUNK_SIZE):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+@api_view(['GET'])
+@conditional_get(versions.PRODUCT_MOVEMENTS, versions.SUPPLY_MOVEMENTS)
+def export_movements(request):
+    formato = request.GET.get("formato", "ndjson")
+    if formato not in ("ndjson", "csv"):
+        return Response({"error": "formato inválido, use 'ndjson' o 'csv'"}, status=status.HTTP_400_BAD_REQUEST)
+
+    name_field, qs = filter_movements(request)
+    columns = ["id", name_field, "user", "modificationType", "modifiedStock",
+               "comentary", "dateHourCreation", "dateHourUpdate"]
+
+    # values_list + iterator: cursor del lado del servidor, memoria constante
+    rows = qs.values_list(
+        "id", f"{name_field}_name", "user_name", "modificationType", "modifiedStock",
+        "comentary", "dateHourCreation", "dateHourUpdate"
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def serialize(row):
+        return [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in row
+        ]
+
+    if formato == "csv":
+        writer = csv.writer(_Echo())
+        lines = itertools.chain(
+            [writer.writerow(columns)],
+            (writer.writerow(serialize(row)) for row in rows)
+        )
+        content_type = "text/csv; charset=utf-8"
+    else:
+        lines = (
+            json.dumps(dict(zip(columns, serialize(row))), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+        content_type = "application/x-ndjson; charset=utf-8"
+
+    response = StreamingHttpResponse(_batched(lines), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="movimientos_{name_field}.{formato}"'
+    return response
+
 @api_view(['GET'])
+@conditional_get(versions.PRODUCT_MOVEMENTS, versions.SUPPLY_MOVEMENTS, versions.PRODUCTS, versions.SUPPLIES)
 def get_movement_by_id(request, movement_id,tipo_movimiento):
     tipo = tipo_movimiento
 
@@ -122,20 +217,40 @@ def create_movement(request, tipo_movimiento):
         target_fk_field = {"supply": supply, "supply_name": supply.name}
 
 
-    Model.objects.create(
-        user=user,
-        user_name=user.username,
-        modificationType=modification_type,
-        modifiedStock=modified_stock,
-        comentary=data.get("comentary", ""),
-        **target_fk_field
-    )
+    with transaction.atomic():
+        movement = Model.objects.create(
+            user=user,
+            user_name=user.username,
+            modificationType=modification_type,
+            modifiedStock=modified_stock,
+            comentary=data.get("comentary", ""),
+            **target_fk_field
+        )
+        record_movement(movement)
 
     return Response(
         {"message": "El movimiento se creó exitosamente."},
         status=201
     )
 
+@api_view(['POST'])
+def create_movements_bulk(request, tipo_movimiento):
+    if tipo_movimiento not in ("productos", "insumos"):
+        return Response({"error": "tipo_movimiento inválido"}, status=400)
+
+    entries = request.data.get("movements") if isinstance(request.data, dict) else request.data
+    if not isinstance(entries, list) or not entries:
+        return Response({"error": "Debe enviar una lista 'movements' con al menos un movimiento"}, status=400)
+    if len(entries) > BULK_MAX_MOVEMENTS:
+        return Response({"error": f"No se pueden crear más de {BULK_MAX_MOVEMENTS} movimientos por solicitud"}, status=400)
+
+    created, errors = ingest_movements(tipo_movimiento, entries)
+
+    return Response(
+        {"message": "Carga masiva de movimientos procesada", "created": created, "failed": len(errors), "errors": errors},
+        status=201 if created else 400
+    )
+
 @api_view(['PUT'])
 def update_movement(request, movement_id, tipo_movimiento):
     tipo = tipo_movimiento
@@ -150,6 +265,7 @@ def update_movement(request, movement_id, tipo_movimiento):
     except Model.DoesNotExist:
         return Response({"error": "Movimiento no encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
+    previous = copy.copy(movement)
     data = request.data
 
     user_name = data.get("user")
@@ -186,7 +302,12 @@ def update_movement(request, movement_id, tipo_movimiento):
 
     if date_hour_creation := data.get("dateHourCreation"):
         movement.dateHourCreation = date_hour_creation
-    movement.save()
+
+    with transaction.atomic():
+        movement.save()
+        discard_movement(previous)
+        record_movement(movement)
+        transaction.on_commit(lambda: invalidate_movement_report(tipo, movement.id))
 
     return Response(
         {"message": "El movimiento se editó exitosamente."},
@@ -207,10 +328,11 @@ def delete_movement(request, movement_id, tipo_movimiento):
     except Model.DoesNotExist:
         return Response({"error": "Movimiento no encontrado."}, status=status.HTTP_404_NOT_FOUND)
 
-    movement.status = False
-    movement.dateHourDeletion = timezone.now()
-
-    movement.save()
+    with transaction.atomic():
+        discard_movement(movement)
+        movement.status = False
+        movement.dateHourDeletion = timezone.now()
+        movement.save()
 
     return Response(
         {"message": "El movimiento se eliminó exitosamente."},
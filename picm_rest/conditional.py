@@ -0,0 +1,53 @@
+import hashlib
+from functools import wraps
+
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from picm_rest.versions import get_versions, shared_cache
+
+
+def conditional_get(*tables, daily=False):
+    """
+    GET condicional (ETag / If-None-Match) para vistas de solo lectura.
+
+    El validador se deriva de las versiones de las tablas de las que depende
+    la vista (un get_many al cache) y de la URL completa, sin ejecutar la
+    vista: si el cliente ya tiene esa versión se responde 304 sin consultar la
+    base de datos ni serializar. Con daily=True también cambia cada día, para
+    respuestas con ventanas relativas a hoy (estadísticas por período).
+
+    Se aplica debajo de @api_view para que la autenticación corra antes. Sin
+    un cache compartido las versiones de otros procesos no se ven y el 304
+    podría servir datos viejos indefinidamente: en ese caso no se envía ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not shared_cache():
+                return view(request, *args, **kwargs)
+
+            # Las versiones se leen antes de ejecutar la vista: si una escritura
+            # llega en medio, el cliente solo pierde un 304, nunca ve datos viejos
+            parts = [view.__module__, view.__qualname__, request.get_full_path(), sorted(get_versions(*tables).items())]
+            if daily:
+                parts.append(timezone.localdate().isoformat())
+            etag = '"%s"' % hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match:
+                client_etags = parse_etags(if_none_match)
+                if etag in client_etags or '*' in client_etags:
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                # El cliente puede guardar la respuesta pero debe revalidarla siempre
+                response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,205 @@
+import threading
+import time
+
+from django.db import connection
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+
+# Bits de precisión de cada rango de potencias de 2: 128 sub-buckets dan un
+# error relativo menor a 1/64 (~1,6%) para cualquier valor registrado.
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# Nombre, ayuda y divisor para exportar (los tiempos se guardan en microsegundos)
+METRICS = {
+    'duration': ('picm_request_duration_seconds', "Tiempo total de la request por endpoint.", 1_000_000),
+    'db_queries': ('picm_request_db_queries', "Consultas SQL ejecutadas por request.", 1),
+    'db_duration': ('picm_request_db_duration_seconds', "Tiempo en la base de datos por request.", 1_000_000),
+    'render_duration': ('picm_request_render_duration_seconds', "Tiempo de renderizado (serialización a JSON) por request.", 1_000_000),
+}
+
+UNRESOLVED_ENDPOINT = 'unresolved'
+
+
+def _bucket_index(value):
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return shift * SUB_BUCKET_HALF + (value >> shift)
+
+
+def _bucket_upper_bound(index):
+    # Mayor valor equivalente al bucket, como reporta HdrHistogram
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = index // SUB_BUCKET_HALF - 1
+    mantissa = index - shift * SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """
+    Histograma log-lineal al estilo HDR para enteros no negativos: cada
+    potencia de 2 se divide en sub-buckets de igual ancho, así que la memoria
+    crece con el logaritmo del rango y los percentiles mantienen precisión
+    relativa constante. Los buckets se guardan de forma dispersa.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        value = max(0, int(value))
+        index = _bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentiles(self, quantiles):
+        """Valores para cada cuantil (ordenados) en una sola pasada por los buckets."""
+        results = []
+        if not self.count:
+            return [0 for _ in quantiles]
+        buckets = sorted(self.counts.items())
+        position = 0
+        seen = 0
+        for quantile in quantiles:
+            target = max(1, quantile * self.count)
+            while seen + buckets[position][1] < target:
+                seen += buckets[position][1]
+                position += 1
+            results.append(min(_bucket_upper_bound(buckets[position][0]), self.max))
+        return results
+
+
+class MetricsRegistry:
+    """Histogramas por endpoint y métrica, compartidos por los hilos del worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def record(self, endpoint, **values):
+        with self._lock:
+            histograms = self._histograms.setdefault(endpoint, {})
+            for metric, value in values.items():
+                histograms.setdefault(metric, Histogram()).record(value)
+
+    def snapshot(self):
+        """{endpoint: {métrica: (percentiles, suma, cantidad, máximo)}} tomado bajo el lock."""
+        with self._lock:
+            return {
+                endpoint: {
+                    metric: (histogram.percentiles(QUANTILES), histogram.total, histogram.count, histogram.max)
+                    for metric, histogram in histograms.items()
+                }
+                for endpoint, histograms in self._histograms.items()
+            }
+
+
+registry = MetricsRegistry()
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value, divisor):
+    return repr(value / divisor) if divisor != 1 else str(value)
+
+
+def render_prometheus(snapshot):
+    """Exporta el snapshot como summaries en el formato de texto de Prometheus."""
+    lines = []
+    for metric, (name, help_text, divisor) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} summary")
+        for endpoint in sorted(snapshot):
+            if metric not in snapshot[endpoint]:
+                continue
+            values, total, count, maximum = snapshot[endpoint][metric]
+            label = f'endpoint="{_escape_label(endpoint)}"'
+            for quantile, value in zip(QUANTILES, values):
+                lines.append(f'{name}{{{label},quantile="{quantile}"}} {_format_number(value, divisor)}')
+            lines.append(f'{name}{{{label},quantile="1"}} {_format_number(maximum, divisor)}')
+            lines.append(f'{name}_sum{{{label}}} {_format_number(total, divisor)}')
+            lines.append(f'{name}_count{{{label}}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+class QueryCollector:
+    """execute_wrapper que cuenta las consultas y acumula su duración."""
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """
+    Registra por nombre de URL resuelto la cantidad de consultas, el tiempo en
+    la base de datos, el de renderizado y el total de cada request. Va arriba
+    en MIDDLEWARE para que el tiempo total incluya al resto de middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        started = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        values = {
+            'duration': elapsed * 1_000_000,
+            'db_queries': collector.queries,
+            'db_duration': collector.duration * 1_000_000,
+        }
+        # Solo las respuestas renderizadas (las de DRF) tienen tiempo de
+        # renderizado; registrar 0 en el resto distorsionaría los percentiles
+        render_duration = getattr(request, '_metrics_render_duration', None)
+        if render_duration is not None:
+            values['render_duration'] = render_duration * 1_000_000
+
+        match = request.resolver_match
+        endpoint = match.view_name if match is not None else UNRESOLVED_ENDPOINT
+        registry.record(endpoint, **values)
+        return response
+
+    def process_template_response(self, request, response):
+        # Se llama justo antes de response.render(); el callback marca el final
+        render_started = time.perf_counter()
+
+        def record_render_duration(rendered):
+            request._metrics_render_duration = time.perf_counter() - render_started
+
+        response.add_post_render_callback(record_render_duration)
+        return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def metrics_view(request):
+    return HttpResponse(
+        render_prometheus(registry.snapshot()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
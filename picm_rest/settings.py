@@ -70,11 +70,13 @@ INSTALLED_APPS = [
     'supplies',
     'movements',
     'stats',
-    'reports'
+    'reports',
+    'search'
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'picm_rest.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -187,7 +189,32 @@ else:
         }
     }
 
-
+# Stats cache: keys are shared across users and versioned, every write to
+# movements, stock or catalogue invalidates them, so the TTL can be long.
+# That only holds with a shared cache (Redis): with the per-process LocMemCache
+# fallback, writes from other processes are not seen and the short
+# STATS_CACHE_LOCAL_TIMEOUT is used instead.
+STATS_CACHE_TIMEOUT = int(os.environ.get('STATS_CACHE_TIMEOUT', '3600'))
+STATS_CACHE_LOCAL_TIMEOUT = int(os.environ.get('STATS_CACHE_LOCAL_TIMEOUT', '30'))
+# Expired stats stay readable this long while a single worker recomputes them,
+# and the recompute lock is released after STATS_CACHE_LOCK_TIMEOUT at most.
+STATS_CACHE_STALE_TIMEOUT = int(os.environ.get('STATS_CACHE_STALE_TIMEOUT', '300'))
+STATS_CACHE_LOCK_TIMEOUT = int(os.environ.get('STATS_CACHE_LOCK_TIMEOUT', '30'))
+
+
+
+# Reports: maximum rows in a movements PDF (the request may ask for fewer via ?limit=)
+REPORTS_MAX_ROWS = int(os.environ.get('REPORTS_MAX_ROWS', '10000'))
+# Larger reports are queued as ReportJob and rendered by `manage.py run_report_worker`
+REPORTS_INLINE_MAX_ROWS = int(os.environ.get('REPORTS_INLINE_MAX_ROWS', '1000'))
+# Running jobs older than this (seconds) are requeued when a worker starts
+REPORT_JOB_TIMEOUT = int(os.environ.get('REPORT_JOB_TIMEOUT', '900'))
+# Finished and failed jobs (and their PDFs) are deleted after this many seconds
+REPORT_JOB_RETENTION = int(os.environ.get('REPORT_JOB_RETENTION', '86400'))
+# How often (seconds) the worker purges expired jobs
+REPORT_JOB_PURGE_INTERVAL = int(os.environ.get('REPORT_JOB_PURGE_INTERVAL', '3600'))
+# Rendered single-movement PDFs are cached by content hash
+REPORTS_CACHE_TIMEOUT = int(os.environ.get('REPORTS_CACHE_TIMEOUT', '86400'))
 
 # Email settings (read from environment for production)
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
@@ -2,6 +2,8 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from picm_rest.metrics import metrics_view
+
 
 
 urlpatterns = [
@@ -12,4 +14,5 @@ urlpatterns = [
     path('api/movements/', include('movements.urls')),
     path('api/statistics/', include('stats.urls')),
     path('api/reports/', include('reports.urls')),
+    path('api/_metrics', metrics_view, name='metrics'),
 ]
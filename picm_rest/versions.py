@@ -0,0 +1,149 @@
+import time
+
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import models, transaction
+from django.db.models.signals import class_prepared, post_save, post_delete, m2m_changed
+
+# Tablas lógicas con contador de versión propio. Los modelos declaran la suya
+# con el atributo version_table y usan VersionedQuerySet como manager.
+PRODUCTS = 'products'
+CATEGORIES = 'categories'
+SUPPLIES = 'supplies'
+SUPPLIERS = 'suppliers'
+PRODUCT_MOVEMENTS = 'product_movements'
+SUPPLY_MOVEMENTS = 'supply_movements'
+
+TABLES = (PRODUCTS, CATEGORIES, SUPPLIES, SUPPLIERS, PRODUCT_MOVEMENTS, SUPPLY_MOVEMENTS)
+
+# Versión lógica para datos derivados que cambian sin escribir en las tablas
+# anteriores (rollups reconstruidos); las estadísticas dependen de todo
+STATS = 'stats'
+STATS_TABLES = TABLES + (STATS,)
+
+
+def shared_cache():
+    """
+    Indica si el cache por defecto es compartido entre procesos. Con LocMemCache
+    (el respaldo cuando no hay REDIS_URL) cada proceso tiene sus propias
+    versiones: los incrementos hechos por comandos de gestión, por el worker de
+    reportes o por otros workers de gunicorn no llegan al que atiende el
+    request, así que quien dependa de las versiones debe desactivarse o usar
+    vencimientos cortos.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if shared_cache():
+        return []
+    return [checks.Warning(
+        "El cache por defecto no es compartido entre procesos.",
+        hint="Los contadores de versión necesitan un cache compartido (Redis vía REDIS_URL): "
+             "sin él se desactivan los ETag, las estadísticas usan STATS_CACHE_LOCAL_TIMEOUT y el índice de autocompletado se reconstruye periódicamente.",
+        id='picm_rest.W001',
+    )]
+
+
+def _version_key(table):
+    return f"table_version_{table}"
+
+
+def get_versions(*tables):
+    """
+    Devuelve {tabla: versión} con un solo get_many. Las versiones ausentes
+    (cache reiniciado o expulsado) se inicializan con el reloj para no
+    repetir nunca un valor anterior.
+    """
+    keys = {_version_key(table): table for table in tables}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, table in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, int(time.time() * 1000), None)
+            version = cache.get(key)
+        versions[table] = version
+    return versions
+
+
+def versions_key(*tables):
+    """Fragmento de clave de cache que cambia cuando cambia cualquiera de las tablas."""
+    versions = get_versions(*tables)
+    return "-".join(str(versions[table]) for table in tables)
+
+
+def _bump(tables):
+    for table in tables:
+        try:
+            cache.incr(_version_key(table))
+        except ValueError:
+            get_versions(table)
+
+
+def bump_versions(*tables):
+    """
+    Incrementa la versión de las tablas. Se difiere al commit para que ningún
+    lector asocie la nueva versión a datos previos a la escritura.
+    """
+    transaction.on_commit(lambda: _bump(tables))
+
+
+class VersionedQuerySet(models.QuerySet):
+    """
+    QuerySet cuyas escrituras masivas, que no emiten señales, incrementan la
+    versión de la tabla del modelo. save() y delete() de instancias la
+    incrementan a través de las señales conectadas en _track_versioned_model.
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            bump_versions(self.model.version_table)
+        return rows
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            bump_versions(self.model.version_table)
+        return objs
+    bulk_create.alters_data = True
+
+    def delete(self):
+        result = super().delete()
+        if result[0]:
+            bump_versions(self.model.version_table)
+        return result
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+def _bump_on_write(sender, **kwargs):
+    bump_versions(sender.version_table)
+
+
+def _track_versioned_model(sender, **kwargs):
+    # Las señales se conectan solo para los modelos versionados: un receptor
+    # sin sender desactivaría el borrado rápido (sin señales) del resto
+    if getattr(sender, 'version_table', None) and not sender._meta.abstract:
+        post_save.connect(_bump_on_write, sender=sender, weak=False)
+        post_delete.connect(_bump_on_write, sender=sender, weak=False)
+
+
+class_prepared.connect(_track_versioned_model)
+
+
+def _bump_on_m2m_change(sender, instance, action, model, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    tables = {getattr(instance, 'version_table', None), getattr(model, 'version_table', None)}
+    tables.discard(None)
+    if tables:
+        bump_versions(*tables)
+
+
+m2m_changed.connect(_bump_on_m2m_change)
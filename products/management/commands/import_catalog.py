@@ -0,0 +1,166 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from products.models import Product, Category
+from supplies.models import Supplies, Supplier
+from search.autocomplete import invalidate_autocomplete
+from stats.totals import apply_totals, contribution
+
+# Columnas obligatorias por catálogo; mismos nombres que los payloads de la API
+REQUIRED_COLUMNS = {
+    'productos': {'nombre', 'descripcion', 'precio', 'categoria'},
+    'insumos': {'nombre', 'descripcion', 'precio_unitario', 'proveedor'},
+}
+# Separador de categorías dentro de la columna "categoria"
+CATEGORY_SEPARATOR = '|'
+
+
+def _name_map(queryset):
+    # Ante nombres repetidos gana el de menor id, igual que .first() en las vistas
+    names = {}
+    for item_id, name in queryset.order_by('id').values_list('id', 'name'):
+        names.setdefault(name, item_id)
+    return names
+
+
+def _format_error(error):
+    return "; ".join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+
+
+class Command(BaseCommand):
+    help = "Importa un catálogo de productos o insumos desde un CSV con inserciones masivas por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Ruta del archivo CSV (UTF-8, con encabezados)")
+        parser.add_argument('--tipo', choices=sorted(REQUIRED_COLUMNS), default='productos')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Valida el archivo completo sin escribir en la base de datos")
+
+    def handle(self, *args, **options):
+        tipo = options['tipo']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        # Los nombres se resuelven una sola vez: ninguna fila consulta la base de datos
+        if tipo == 'productos':
+            names = _name_map(Category.objects.all())
+            build, flush = self.build_product, self.flush_products
+        else:
+            names = _name_map(Supplier.objects.all())
+            build, flush = self.build_supply, self.flush_supplies
+
+        processed = created = failed = 0
+        try:
+            csv_file = open(options['path'], newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f"No se pudo abrir el archivo: {e}")
+
+        with csv_file:
+            reader = csv.DictReader(csv_file, delimiter=options['delimiter'])
+            missing = REQUIRED_COLUMNS[tipo] - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Faltan columnas en el CSV: {', '.join(sorted(missing))}")
+
+            batch = []
+            # La línea 1 es el encabezado
+            for line, row in enumerate(reader, start=2):
+                processed += 1
+                item, error = build(row, names)
+                if error:
+                    failed += 1
+                    self.stderr.write(f"Línea {line}: {error}")
+                else:
+                    batch.append(item)
+
+                if len(batch) >= batch_size:
+                    created += self.write_batch(flush, batch, dry_run)
+                    batch = []
+                    self.report_progress(processed, created, failed, dry_run)
+
+            if batch:
+                created += self.write_batch(flush, batch, dry_run)
+            self.report_progress(processed, created, failed, dry_run)
+
+        if created and not dry_run:
+            # bulk_create no emite post_save: el índice de nombres se invalida a mano
+            invalidate_autocomplete(Product if tipo == 'productos' else Supplies)
+
+        verb = "validadas" if dry_run else "importadas"
+        self.stdout.write(self.style.SUCCESS(f"Catálogo de {tipo}: {created} filas {verb}, {failed} con errores"))
+
+    def report_progress(self, processed, created, failed, dry_run):
+        suffix = " (simulación)" if dry_run else ""
+        self.stdout.write(f"{processed} filas procesadas: {created} válidas, {failed} con errores{suffix}")
+
+    def write_batch(self, flush, batch, dry_run):
+        if not dry_run:
+            with transaction.atomic():
+                items = flush(batch)
+                count, value = 0, 0
+                for item in items:
+                    item_count, item_value = contribution(item)
+                    count += item_count
+                    value += item_value
+                apply_totals(type(items[0]), count, value)
+        return len(batch)
+
+    def build_product(self, row, categories):
+        category_names = list(dict.fromkeys(
+            name.strip() for name in (row.get('categoria') or '').split(CATEGORY_SEPARATOR) if name.strip()
+        ))
+        if not category_names:
+            return None, "La categoría es obligatoria"
+        unknown = [name for name in category_names if name not in categories]
+        if unknown:
+            return None, f"Categorías inexistentes: {', '.join(unknown)}"
+
+        product = Product(
+            name=(row.get('nombre') or '').strip(),
+            description=(row.get('descripcion') or '').strip(),
+            price=(row.get('precio') or '').strip(),
+            stock=(row.get('stock') or '').strip() or 0,
+            status=True
+        )
+        try:
+            # Solo validaciones de campo en memoria; Product no tiene restricciones unique
+            product.clean_fields(exclude=['category'])
+        except ValidationError as e:
+            return None, _format_error(e)
+        return (product, [categories[name] for name in category_names]), None
+
+    def build_supply(self, row, suppliers):
+        supplier_name = (row.get('proveedor') or '').strip()
+        if supplier_name not in suppliers:
+            return None, f"Proveedor inexistente: {supplier_name or '(vacío)'}"
+
+        supply = Supplies(
+            name=(row.get('nombre') or '').strip(),
+            description=(row.get('descripcion') or '').strip(),
+            unitaryPrice=(row.get('precio_unitario') or '').strip(),
+            stock=(row.get('stock') or '').strip() or 0,
+            supplier_id=suppliers[supplier_name],
+            status=True
+        )
+        try:
+            supply.clean_fields(exclude=['supplier'])
+        except ValidationError as e:
+            return None, _format_error(e)
+        return supply, None
+
+    def flush_products(self, batch):
+        products = Product.objects.bulk_create([product for product, _ in batch])
+        Through = Product.category.through
+        Through.objects.bulk_create([
+            Through(product_id=product.id, category_id=category_id)
+            for product, (_, category_ids) in zip(products, batch)
+            for category_id in category_ids
+        ])
+        return products
+
+    def flush_supplies(self, batch):
+        return Supplies.objects.bulk_create(batch)
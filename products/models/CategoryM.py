@@ -1,9 +1,14 @@
 from django.db import models
+from picm_rest import versions
+from picm_rest.versions import VersionedQuerySet
 
 
 # Category Model
 
 class Category(models.Model):
+    version_table = versions.CATEGORIES
+    objects = VersionedQuerySet.as_manager()
+
     name = models.CharField(max_length=30, unique=True, blank=False)
     description = models.CharField(max_length=70,blank=False)
     status = models.BooleanField(default=True)
@@ -1,4 +1,6 @@
 from django.db import models
+from picm_rest import versions
+from picm_rest.versions import VersionedQuerySet
 from django.db.models import F, Sum
 from .CategoryM import Category
 from django.core.validators import RegexValidator
@@ -6,6 +8,9 @@ from django.core.validators import RegexValidator
 # Product Model
 
 class Product(models.Model):
+    version_table = versions.PRODUCTS
+    objects = VersionedQuerySet.as_manager()
+
     name = models.CharField(max_length=30)
     description = models.CharField(max_length=70,blank=False)
     price = models.DecimalField(
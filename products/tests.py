@@ -1,3 +1,43 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from search.autocomplete import get_autocomplete_version
+from .models import Product
+
+
+class AutocompleteInvalidationTests(TestCase):
+    """El índice de autocompletado solo se invalida si cambian nombres o estados."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('products_tester', password='x'))
+        self.product = Product.objects.create(name='Tornillo', description='Producto de prueba', price='10.00', stock=5)
+
+    def update(self, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f'/api/products/update/{self.product.id}', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_price_and_stock_edits_keep_the_index(self):
+        version = get_autocomplete_version(Product)
+        self.update({'precio': '12.00', 'stock': 8})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f'/api/products/update-stock/{self.product.id}?increase=true', {'stock': 3}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_autocomplete_version(Product), version)
+
+    def test_name_edit_and_delete_invalidate_the_index(self):
+        version = get_autocomplete_version(Product)
+        self.update({'nombre': 'Tuerca'})
+        renamed = get_autocomplete_version(Product)
+        self.assertNotEqual(renamed, version)
+        self.assertEqual(self.client.get('/api/products/autocomplete', {'q': 'tue'}).data, ['Tuerca'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/products/delete/{self.product.id}')
+        self.assertNotEqual(get_autocomplete_version(Product), renamed)
@@ -6,10 +6,12 @@ urlpatterns = [
     path('get', get_product, name='products_get'),
     path('get/<int:product_id>', get_product_by_id, name='product_by_id'),
     path('get-products-name', get_products_name, name='products_name'),
+    path('autocomplete', autocomplete_products, name='products_autocomplete'),
     path('create',create_product, name='create_product'),
     path('total-stock', get_total_stock, name='total_stock'),
     path('total-stock-value', get_total_stock_value, name='total_stock_value'),
     path('update/<int:product_id>', update_product, name='update_product'),
+    path('update-stock/bulk', update_product_stock_bulk, name='update_product_stock_bulk'),
     path('update-stock/<int:product_id>', update_product_stock, name='update_product_stock'),
     path('delete/<int:product_id>', delete_product, name='delete_product'),
 
@@ -1,10 +1,18 @@
+import copy
 from rest_framework.decorators import api_view  
 from rest_framework.response import Response
 from rest_framework import status
+from picm_rest.conditional import conditional_get
+from picm_rest import versions
 from rest_framework.pagination import PageNumberPagination
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from .models.ProductM import Product
 from .models.CategoryM import Category
-from movements.models import ProductMovement
+from search.backends import search_queryset
+from search.autocomplete import autocomplete, parse_limit
+from stats.totals import get_totals, record_item_change
+from movements.stock import adjust_stock, adjust_stock_bulk, set_stock, InsufficientStock, BULK_MAX_ITEMS
 
 
 class Pagination(PageNumberPagination):
@@ -12,23 +20,33 @@ class Pagination(PageNumberPagination):
     page_size_query_param = 'limit'
 
 @api_view(['GET'])
+@conditional_get(versions.PRODUCTS, versions.CATEGORIES)
 def get_product(request):
     try:
+        products = Product.objects.filter(status='1')
         if 'search' in request.GET:
-            search_term = request.GET['search']
-            products = Product.objects.filter(name__icontains=search_term, status='1')
-        else:
-            products = Product.objects.filter(status='1')
+            # Resultados ordenados por relevancia; 'filter' reemplaza ese orden
+            products = search_queryset(products, request.GET['search'])
 
         sort_by = request.query_params.get('filter')
         category_name = request.query_params.get('category')
 
         if category_name:
-            products = products.filter(category__name__icontains=category_name)
+            # Exists en lugar de JOIN: un producto con varias categorías que
+            # coinciden no se repite ni infla el COUNT(*) de la paginación
+            products = products.filter(Exists(
+                Product.category.through.objects.filter(
+                    product_id=OuterRef('pk'),
+                    category__name__icontains=category_name
+                )
+            ))
 
         if sort_by  in ['price','-price', 'stock', '-stock']:
             products = products.order_by(sort_by)
 
+        # Una sola consulta para las categorías de toda la página (returnCategoriesAsText usa el prefetch)
+        products = products.prefetch_related('category')
+
         paginator = Pagination()
         result_page = paginator.paginate_queryset(products, request)
         data = [
@@ -48,6 +66,7 @@ def get_product(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_get(versions.PRODUCTS, versions.CATEGORIES)
 def get_product_by_id(request, product_id):
     try:
         product = Product.objects.get(id=product_id, status='1')
@@ -67,36 +86,49 @@ def get_product_by_id(request, product_id):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_get(versions.PRODUCTS)
 def get_products_name(request):
     try:
-        products = Product.objects.filter(status='1')
-        data = [p.name for p in products]
+        data = list(Product.objects.filter(status='1').values_list('name', flat=True))
         return Response(data, status=status.HTTP_200_OK)
     except Exception as e:
         print(e)
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@conditional_get(versions.PRODUCTS)
+def autocomplete_products(request):
+    try:
+        names = autocomplete(Product, request.GET.get('q', ''), parse_limit(request.GET.get('limit')))
+        return Response(names, status=status.HTTP_200_OK)
+    except Exception as e:
+        print(e)
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     
 
 @api_view(['GET'])
+@conditional_get(versions.PRODUCTS)
 def get_total_stock(request):
     try:
-        total_products = Product.calculateTotalProducts()
+        total_products = get_totals().product_count
         return Response({"total_products": total_products}, status=status.HTTP_200_OK)
     except Exception as e:
         print(e)
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 @api_view(['GET'])
+@conditional_get(versions.PRODUCTS)
 def get_total_stock_value(request):
     try:
-        total_stock_value = Product.calculateTotalStock()
+        total_stock_value = get_totals().product_stock_value
         return Response({"total_stock_value": total_stock_value}, status=status.HTTP_200_OK)
     except Exception as e:
         print(e)
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_get(versions.CATEGORIES)
 def get_categories(request):
     try:
         categories = Category.objects.all()
@@ -122,13 +154,15 @@ def create_product(request):
             return Response({"error": "La categoría especificada no existe."}, status=status.HTTP_409_CONFLICT)
         if not all([name, description, price, category]):
             return Response({"error": "Todos los campos son obligatorios."}, status=status.HTTP_409_CONFLICT)
-        product = Product.objects.create(
-            name=name,
-            description=description,
-            price=price,
-            status=True
-        )
-        product.category.set([category])
+        with transaction.atomic():
+            product = Product.objects.create(
+                name=name,
+                description=description,
+                price=price,
+                status=True
+            )
+            product.category.set([category])
+            record_item_change(None, product)
         return Response({"message": "Producto creado exitosamente", "product_id": product.id}, status=status.HTTP_201_CREATED)
     
     except Exception as e:
@@ -139,29 +173,33 @@ def create_product(request):
 def update_product(request, product_id):
     try:
         data = request.data
-        product = Product.objects.get(id=product_id, status='1')
         name = data.get('nombre')
         description = data.get('descripcion')
         price = data.get('precio')
         stock = data.get('stock')
         category_name = data.get('categoria')
 
-        if category_name:
-            category = Category.objects.filter(name=category_name).first()
-            if category is None:
-                return Response({"error": "La categoría especificada no existe."}, status=status.HTTP_400_BAD_REQUEST)
-            product.category.set([category])
+        with transaction.atomic():
+            product = Product.objects.select_for_update().get(id=product_id, status='1')
+            previous = copy.copy(product)
+
+            if category_name:
+                category = Category.objects.filter(name=category_name).first()
+                if category is None:
+                    return Response({"error": "La categoría especificada no existe."}, status=status.HTTP_400_BAD_REQUEST)
+                product.category.set([category])
+
+            if name:
+                product.name = name
+            if description:
+                product.description = description
+            if price is not None:
+                product.price = price
+            if stock is not None:
+                product.stock = stock
 
-        if name:
-            product.name = name
-        if description:
-            product.description = description
-        if price is not None:
-            product.price = price
-        if stock is not None:
-            product.stock = stock
-
-        product.save()
+            product.save()
+            record_item_change(previous, product)
         return Response({"message": "Producto actualizado exitosamente"}, status=status.HTTP_200_OK)
     
     except Product.DoesNotExist:
@@ -173,9 +211,12 @@ def update_product(request, product_id):
 @api_view(['DELETE'])
 def delete_product(request, product_id):
     try:
-        product = Product.objects.get(id=product_id, status='1')
-        product.status = False
-        product.save()
+        with transaction.atomic():
+            product = Product.objects.select_for_update().get(id=product_id, status='1')
+            previous = copy.copy(product)
+            product.status = False
+            product.save()
+            record_item_change(previous, product)
         return Response({"message": "Producto eliminado exitosamente"}, status=status.HTTP_200_OK)
     except Product.DoesNotExist:
         return Response({"error": "Producto no encontrado"}, status=status.HTTP_404_NOT_FOUND)
@@ -183,11 +224,30 @@ def delete_product(request, product_id):
         print(e)
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+@api_view(['POST'])
+def update_product_stock_bulk(request):
+    try:
+        entries = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(entries, list) or not entries:
+            return Response({"error": "Debe enviar una lista 'items' con elementos {id, delta, comentary}"}, status=400)
+        if len(entries) > BULK_MAX_ITEMS:
+            return Response({"error": f"Máximo {BULK_MAX_ITEMS} elementos por solicitud"}, status=400)
+
+        results = adjust_stock_bulk(Product, entries, request.user)
+        applied = sum(1 for result in results if result["status"] == "ok")
+        return Response({
+            "message": "Ajuste masivo de stock procesado",
+            "applied": applied,
+            "failed": len(results) - applied,
+            "results": results
+        }, status=200)
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
 @api_view(['PUT'])
 def update_product_stock(request, product_id):
     try:
-        print(request.data, request.query_params)
-        product = Product.objects.get(id=product_id, status='1')
         data = request.data
         increase = request.query_params.get('increase') == 'true'
         decrease = request.query_params.get('decrease') == 'true'
@@ -199,32 +259,17 @@ def update_product_stock(request, product_id):
         if increase:
             if(int(stock) < 0):
                 return Response({"error": "El stock a aumentar debe ser mayor que 0"}, status=400)
-            product.stock += int(stock)
-            product.save()
-            ProductMovement.objects.create(
-                user=request.user,
-                user_name=request.user.username,
-                product=product,
-                product_name=product.name,
-                modificationType='Entrada',
-                modifiedStock=int(stock)
-            )
-            return Response({"message": "Stock aumentado", "stock": product.stock}, status=200)
+            new_stock, _ = adjust_stock(Product, product_id, int(stock), request.user)
+            return Response({"message": "Stock aumentado", "stock": new_stock}, status=200)
 
         if decrease:
             if(int(stock) < 0):
                 return Response({"error": "El stock a disminuir debe ser mayor que 0"}, status=400)
-            product.stock -= int(stock)
-            product.save()
-            ProductMovement.objects.create(
-                user=request.user,
-                user_name=request.user.username,
-                product=product,
-                product_name=product.name,
-                modificationType='Salida',
-                modifiedStock=int(stock)
-            )
-            return Response({"message": "Stock disminuido", "stock": product.stock}, status=200)
+            try:
+                new_stock, _ = adjust_stock(Product, product_id, -int(stock), request.user)
+            except InsufficientStock as e:
+                return Response({"error": str(e)}, status=400)
+            return Response({"message": "Stock disminuido", "stock": new_stock}, status=200)
 
         # Si no viene increase/decrease, usar stock directo:
         stock = request.data.get('stock')
@@ -233,9 +278,8 @@ def update_product_stock(request, product_id):
         if int(stock) < 0:
             return Response({"error": "Stock no puede ser negativo"}, status=400)
 
-        product.stock = int(stock)
-        product.save()
-        return Response({"message": "Stock actualizado", "stock": product.stock}, status=200)
+        new_stock = set_stock(Product, product_id, int(stock))
+        return Response({"message": "Stock actualizado", "stock": new_stock}, status=200)
 
     except Product.DoesNotExist:
         return Response({"error": "Producto no encontrado"}, status=404)
@@ -245,6 +289,7 @@ def update_product_stock(request, product_id):
 
 
 @api_view(['GET'])
+@conditional_get(versions.CATEGORIES)
 def get_categories_all(request):
     try:
         categories = Category.objects.filter(status=True)
@@ -258,6 +303,7 @@ def get_categories_all(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
+@conditional_get(versions.CATEGORIES)
 def get_category_by_id(request, category_id):
     try:
         if not category_id:
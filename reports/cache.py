@@ -0,0 +1,40 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Cambiar al modificar el diseño del PDF: invalida todas las entradas anteriores
+REPORT_TEMPLATE_VERSION = "1"
+
+
+def report_digest(title, columns, rows):
+    payload = json.dumps([REPORT_TEMPLATE_VERSION, title, columns, rows], default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _report_key(digest):
+    return f"report_pdf_{digest}"
+
+
+def _movement_key(tipo, movement_id):
+    return f"report_pdf_movement_{tipo}_{movement_id}"
+
+
+def get_cached_report(digest):
+    return cache.get(_report_key(digest))
+
+
+def cache_report(tipo, movement_id, digest, content):
+    # El puntero por movimiento permite borrar la entrada cuando el movimiento cambia
+    timeout = settings.REPORTS_CACHE_TIMEOUT
+    cache.set_many({
+        _report_key(digest): content,
+        _movement_key(tipo, movement_id): digest,
+    }, timeout)
+
+
+def invalidate_movement_report(tipo, movement_id):
+    digest = cache.get(_movement_key(tipo, movement_id))
+    if digest:
+        cache.delete_many([_report_key(digest), _movement_key(tipo, movement_id)])
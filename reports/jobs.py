@@ -0,0 +1,109 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from movements.models import ProductMovement, SupplyMovement
+from .models import ReportJob
+from .pdfGenerator import generate_movements_pdf
+
+REPORT_CHUNK_SIZE = 2000
+
+MOVEMENT_REPORTS = {
+    'productos': {
+        'model': ProductMovement,
+        'name_field': 'product_name',
+        'item_column': 'Producto',
+        'title': "Movimientos de Productos",
+        'filename': 'movimientos_productos.pdf',
+    },
+    'insumos': {
+        'model': SupplyMovement,
+        'name_field': 'supply_name',
+        'item_column': 'Insumo',
+        'title': "Movimientos de Insumos",
+        'filename': 'movimientos_insumos.pdf',
+    },
+}
+
+
+def movements_report_queryset(tipo, limit):
+    Model = MOVEMENT_REPORTS[tipo]['model']
+    return Model.objects.filter(status=1).order_by('dateHourCreation', 'id')[:limit]
+
+
+def movement_rows(qs, name_field):
+    for m_id, item_name, modified_stock, modification_type, user_name, created, comentary in qs.values_list(
+        'id', name_field, 'modifiedStock', 'modificationType', 'user_name', 'dateHourCreation', 'comentary'
+    ).iterator(chunk_size=REPORT_CHUNK_SIZE):
+        yield [
+            m_id,
+            item_name,
+            modified_stock,
+            modification_type,
+            user_name,
+            created.strftime('%Y/%m/%d') if created else '',
+            comentary or ''
+        ]
+
+
+def render_movements_report(tipo, limit):
+    report = MOVEMENT_REPORTS[tipo]
+    columns = ['ID', report['item_column'], 'Cantidad', 'Tipo', 'Usuario', 'Fecha', 'Comentario']
+    fecha_hora = datetime.datetime.now().isoformat()
+    rows = movement_rows(movements_report_queryset(tipo, limit), report['name_field'])
+    return generate_movements_pdf(rows, columns, doc_title=report['title'], fecha_hora=fecha_hora, logo_path=None)
+
+
+def claim_next_job():
+    """
+    Toma el trabajo pendiente más antiguo. El UPDATE condicionado al estado
+    garantiza que dos workers nunca procesen el mismo trabajo.
+    """
+    for job_id in ReportJob.objects.filter(status=ReportJob.PENDING).order_by('dateHourCreation', 'id').values_list('id', flat=True)[:10]:
+        claimed = ReportJob.objects.filter(id=job_id, status=ReportJob.PENDING).update(
+            status=ReportJob.RUNNING,
+            dateHourStart=timezone.now()
+        )
+        if claimed:
+            return ReportJob.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs():
+    # Trabajos que quedaron "en proceso" porque un worker murió a mitad de camino
+    limit = timezone.now() - datetime.timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+    return ReportJob.objects.filter(status=ReportJob.RUNNING).filter(
+        Q(dateHourStart__lt=limit) | Q(dateHourStart__isnull=True)
+    ).update(status=ReportJob.PENDING, dateHourStart=None)
+
+
+def process_job(job):
+    try:
+        buffer = render_movements_report(job.reportType, job.rowLimit)
+        job.content = buffer.read()
+        buffer.close()
+
+        job.status = ReportJob.DONE
+        job.error = ''
+    except Exception as e:
+        job.status = ReportJob.FAILED
+        job.error = str(e)[:255]
+
+    job.dateHourFinish = timezone.now()
+    job.save(update_fields=['status', 'content', 'error', 'dateHourFinish'])
+    return job
+
+
+def purge_expired_jobs():
+    """
+    Borra los trabajos terminados o fallidos hace más de REPORT_JOB_RETENTION
+    segundos, junto con su PDF. Devuelve la cantidad borrada.
+    """
+    limit = timezone.now() - datetime.timedelta(seconds=settings.REPORT_JOB_RETENTION)
+    deleted, _ = ReportJob.objects.filter(
+        status__in=[ReportJob.DONE, ReportJob.FAILED],
+        dateHourFinish__lt=limit
+    ).delete()
+    return deleted
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.jobs import claim_next_job, process_job, purge_expired_jobs, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Procesa los trabajos de reportes PDF pendientes (cola en base de datos, sin broker externo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Procesa los trabajos pendientes y termina")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Segundos de espera cuando no hay trabajos pendientes")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Trabajos reencolados: {requeued}"))
+
+        self.stdout.write("Worker de reportes iniciado")
+        next_purge = 0
+        while True:
+            close_old_connections()
+            if time.monotonic() >= next_purge:
+                purged = purge_expired_jobs()
+                if purged:
+                    self.stdout.write(f"Trabajos vencidos borrados: {purged}")
+                next_purge = time.monotonic() + settings.REPORT_JOB_PURGE_INTERVAL
+
+            job = claim_next_job()
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Procesando trabajo {job.id} ({job.reportType}, {job.rowLimit} filas)")
+            job = process_job(job)
+            if job.status == job.DONE:
+                self.stdout.write(self.style.SUCCESS(f"Trabajo {job.id} terminado ({len(job.content)} bytes)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Trabajo {job.id} falló: {job.error}"))
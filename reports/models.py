@@ -1,3 +1,46 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+# Report Job Model
+# Reportes PDF grandes que se generan fuera del request, con
+# `manage.py run_report_worker`. El PDF terminado se guarda en la fila para que
+# el worker y la web puedan correr en servicios distintos sin disco compartido;
+# los trabajos terminados vencen tras REPORT_JOB_RETENTION segundos.
+
+class ReportJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En proceso'),
+        (DONE, 'Terminado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='report_jobs',
+        null=True,
+        blank=True
+    )
+    reportType = models.CharField(max_length=15)
+    rowLimit = models.IntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    content = models.BinaryField(null=True, blank=True, editable=False)
+    error = models.CharField(max_length=255, blank=True, default='')
+    dateHourCreation = models.DateTimeField(auto_now_add=True)
+    dateHourStart = models.DateTimeField(null=True, blank=True)
+    dateHourFinish = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'dateHourCreation'], name='reportjob_status_created_idx'),
+            models.Index(fields=['dateHourFinish'], name='reportjob_finish_idx'),
+        ]
+
+    def __str__(self):
+        return f"ReportJob {self.id} - Type: {self.reportType} - Status: {self.status}"
@@ -1,47 +1,107 @@
-import io
+import itertools
+import tempfile
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Image, Spacer
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle, Paragraph, Image, Spacer
 from reportlab.lib import colors
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.enums import TA_LEFT
 
+MARGIN = 20
+# Filas que se leen del iterador por página; las que no caben pasan a la siguiente
+ROWS_PER_PAGE = 40
+# El PDF se escribe en memoria hasta este tamaño y luego se vuelca a disco
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#eeeeee")),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+])
+
 def _build_header(doc_title, fecha_hora):
     style = ParagraphStyle(name='default', fontSize=10, alignment=TA_LEFT)
     texto = f"Empresa StayAway Co<br/>{doc_title}<br/>Fecha: {fecha_hora}"
     return Paragraph(texto, style)
 
-def generate_movements_pdf(rows, columns, doc_title="Reporte", fecha_hora="N/A", logo_path=None):
+def _build_table(columns, rows, col_widths):
+    table = Table([columns] + rows, colWidths=col_widths, hAlign='LEFT')
+    table.setStyle(TABLE_STYLE)
+    return table
+
+def _draw_flowable(canv, flowable, y, width):
+    _, height = flowable.wrapOn(canv, width, y - MARGIN)
+    flowable.drawOn(canv, MARGIN, y - height)
+    return y - height
+
+def _rows_that_fit(table, available_height):
+    # _rowHeights queda calculado tras wrapOn; la fila 0 es el encabezado
+    used = table._rowHeights[0]
+    fitting = 0
+    for row_height in table._rowHeights[1:]:
+        if used + row_height > available_height:
+            break
+        used += row_height
+        fitting += 1
+    return max(fitting, 1)
+
+def generate_movements_pdf(rows, columns, doc_title="Reporte", fecha_hora="N/A", logo_path=None,
+                           rows_per_page=ROWS_PER_PAGE):
     """
-    rows: list of lists (data rows)
+    rows: iterable de listas (data rows); puede ser un generador sobre el
+          iterator() del queryset, se consume página a página
     columns: header list
-    devuelve BytesIO con el PDF (posición al inicio)
+    devuelve un archivo temporal con el PDF (posición al inicio)
+
+    Cada página toma a lo sumo rows_per_page filas del iterador, dibuja una
+    tabla con el encabezado de columnas y se cierra antes de leer más, así que
+    en memoria solo vive una página de filas.
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, leftMargin=20, rightMargin=20, topMargin=20, bottomMargin=20)
-
-    elements = []
-    if logo_path:
-        try:
-            img = Image(logo_path, width=80, height=80)
-            elements.append(img)
-            elements.append(Spacer(1, 6))
-        except Exception:
-            pass
-
-    elements.append(_build_header(doc_title, fecha_hora))
-    elements.append(Spacer(1, 12))
-
-    data = [columns] + list(rows)
-    table = Table(data, hAlign='LEFT')
-    style = TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#eeeeee")),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-    ])
-    table.setStyle(style)
-    elements.append(table)
-
-    doc.build(elements)
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    width, height = letter
+    usable_width = width - 2 * MARGIN
+    canv = canvas.Canvas(buffer, pagesize=letter, pageCompression=1)
+
+    rows = iter(rows)
+    carry = []
+    col_widths = None
+    first_page = True
+
+    while True:
+        page_rows = carry + list(itertools.islice(rows, rows_per_page - len(carry)))
+        if not page_rows and not first_page:
+            break
+
+        y = height - MARGIN
+        if first_page:
+            if logo_path:
+                try:
+                    y = _draw_flowable(canv, Image(logo_path, width=80, height=80), y, usable_width)
+                    y = _draw_flowable(canv, Spacer(1, 6), y, usable_width)
+                except Exception:
+                    pass
+            y = _draw_flowable(canv, _build_header(doc_title, fecha_hora), y, usable_width)
+            y = _draw_flowable(canv, Spacer(1, 12), y, usable_width)
+
+        available_height = y - MARGIN
+        table = _build_table(columns, page_rows, col_widths)
+        _, table_height = table.wrapOn(canv, usable_width, available_height)
+        carry = []
+        if table_height > available_height and len(page_rows) > 1:
+            fitting = _rows_that_fit(table, available_height)
+            page_rows, carry = page_rows[:fitting], page_rows[fitting:]
+            table = _build_table(columns, page_rows, col_widths)
+            table.wrapOn(canv, usable_width, available_height)
+
+        # Todas las páginas comparten los anchos calculados para la primera
+        if col_widths is None and page_rows:
+            col_widths = table._colWidths
+        _draw_flowable(canv, table, y, usable_width)
+
+        canv.showPage()
+        first_page = False
+
+    canv.save()
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
@@ -5,4 +5,7 @@ urlpatterns = [
     path('product_movements_pdf', views.download_product_movements_pdf, name='download_product_movements_pdf'),
     path('download-product-report/<int:product_id>', views.download_product_movement_by_id, name='download_product_movement_by_id'),
     path('download-supply-report/<int:supply_id>', views.download_supply_movement_by_id, name='download_supply_movement_by_id'),
+    path('jobs', views.create_report_job, name='create_report_job'),
+    path('jobs/<int:job_id>', views.get_report_job, name='report_job_status'),
+    path('jobs/<int:job_id>/download', views.download_report_job, name='download_report_job'),
 ]
\ No newline at end of file
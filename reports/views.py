@@ -1,88 +1,190 @@
 from rest_framework.decorators import api_view, permission_classes
 from django.views.decorators.http import require_GET
 from rest_framework.permissions import IsAuthenticated
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.response import Response
 from movements.models import ProductMovement
 from movements.models import SupplyMovement
 from .pdfGenerator import generate_movements_pdf
+from .models import ReportJob
+from .jobs import MOVEMENT_REPORTS, movements_report_queryset, render_movements_report
+from .cache import report_digest, get_cached_report, cache_report
+from django.conf import settings
+from django.urls import reverse
 import datetime
+import io
+
+def get_report_limit(request):
+    max_rows = settings.REPORTS_MAX_ROWS
+    try:
+        limit = int(request.GET.get('limit', max_rows))
+    except (TypeError, ValueError):
+        return max_rows
+    return min(max(limit, 1), max_rows)
+
+def enqueue_report(request, tipo, limit):
+    job = ReportJob.objects.create(
+        user=request.user,
+        reportType=tipo,
+        rowLimit=limit
+    )
+    return Response(
+        {
+            "message": "El reporte se está generando.",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": reverse('report_job_status', args=[job.id]),
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
 
 @api_view(['GET'])
 def download_product_movements_pdf(request):
-    qs = ProductMovement.objects.filter(status=1).order_by('dateHourCreation')[:1000]
-    columns = ['ID', 'Producto', 'Cantidad', 'Tipo', 'Usuario', 'Fecha', 'Comentario']
-    rows = []
-    for m in qs:
-        rows.append([
-            m.id,
-            getattr(m, 'product_name', '') or (m.product.name if getattr(m, 'product', None) else ''),
-            getattr(m, 'modifiedStock', m.modified_stock if hasattr(m, 'modified_stock') else ''),
-            getattr(m, 'modificationType', m.modificationType if hasattr(m, 'modificationType') else ''),
-            getattr(m, 'user_name', '') or (m.user.username if getattr(m, 'user', None) else ''),
-            (m.dateHourCreation.strftime('%Y/%m/%d') if getattr(m, 'dateHourCreation', None) else ''),
-            getattr(m, 'comentary', '') or getattr(m, 'description', '') or ''
-        ])
-    meta_title = "Movimientos de Productos"
-    fecha_hora = datetime.datetime.now().isoformat()
-    buf = generate_movements_pdf(rows, columns, doc_title=meta_title, fecha_hora=fecha_hora, logo_path=None)
-    return FileResponse(buf, as_attachment=True, filename='movimientos_productos.pdf')
+    limit = get_report_limit(request)
+    qs = movements_report_queryset('productos', limit)
+
+    # Los documentos grandes nunca se renderizan dentro del request
+    if qs.count() > settings.REPORTS_INLINE_MAX_ROWS:
+        # Los trabajos quedan ligados a su usuario: sin sesión no se encolan
+        if not request.user.is_authenticated:
+            return Response(
+                {"error": "Inicia sesión para generar reportes de más de %d filas" % settings.REPORTS_INLINE_MAX_ROWS},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return enqueue_report(request, 'productos', limit)
+
+    buf = render_movements_report('productos', limit)
+    return FileResponse(buf, as_attachment=True, filename=MOVEMENT_REPORTS['productos']['filename'])
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_report_job(request):
+    tipo = request.data.get('tipo_movimiento', 'productos')
+    if tipo not in MOVEMENT_REPORTS:
+        return Response({"error": "tipo_movimiento inválido"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = int(request.data.get('limit', settings.REPORTS_MAX_ROWS))
+    except (TypeError, ValueError):
+        return Response({"error": "El límite debe ser un número entero válido"}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 1), settings.REPORTS_MAX_ROWS)
+
+    return enqueue_report(request, tipo, limit)
+
+def get_visible_job(request, job_id, with_content=False):
+    # Cada usuario solo ve sus trabajos: un id ajeno responde igual que uno inexistente
+    jobs = ReportJob.objects.all() if with_content else ReportJob.objects.defer('content')
+    return jobs.get(id=job_id, user=request.user)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_report_job(request, job_id):
+    try:
+        job = get_visible_job(request, job_id)
+    except ReportJob.DoesNotExist:
+        return Response({"error": "Trabajo no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+
+    data = {
+        "job_id": job.id,
+        "tipo_movimiento": job.reportType,
+        "status": job.status,
+        "error": job.error,
+        "dateHourCreation": job.dateHourCreation.isoformat(),
+        "dateHourFinish": job.dateHourFinish.isoformat() if job.dateHourFinish else None,
+    }
+    if job.status == ReportJob.DONE:
+        data["download_url"] = reverse('download_report_job', args=[job.id])
+    return Response(data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_report_job(request, job_id):
+    try:
+        job = get_visible_job(request, job_id, with_content=True)
+    except ReportJob.DoesNotExist:
+        return Response({"error": "Trabajo no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+
+    if job.status != ReportJob.DONE:
+        return Response({"error": "El reporte aún no está listo", "status": job.status}, status=status.HTTP_409_CONFLICT)
+
+    if job.content is None:
+        return Response({"error": "El archivo del reporte ya no existe"}, status=status.HTTP_410_GONE)
+
+    filename = MOVEMENT_REPORTS[job.reportType]['filename']
+    return FileResponse(io.BytesIO(job.content), as_attachment=True, filename=filename)
+
+def movement_report_response(request, tipo, movement, item_name, item_column, title):
+    """
+    PDF de un único movimiento con cache direccionado por contenido: la clave
+    (y el ETag) es el hash de la fila y de la versión de la plantilla, así que
+    un movimiento sin cambios no se vuelve a renderizar.
+    """
+    columns = ['ID', item_column, 'Usuario', 'Tipo', 'Stock', 'Comentario', 'Fecha Creación', 'Fecha Modificación']
+    rows = [[
+        movement.id,
+        item_name,
+        movement.user_name,
+        movement.modificationType,
+        movement.modifiedStock,
+        movement.comentary,
+        movement.dateHourCreation.strftime('%Y/%m/%d') if movement.dateHourCreation else '',
+        movement.dateHourUpdate.strftime('%Y/%m/%d') if movement.dateHourUpdate else ''
+    ]]
+
+    digest = report_digest(title, columns, rows)
+    etag = f'"{digest}"'
+
+    # If-None-Match usa comparación débil: se ignora el prefijo W/ (lo agregan
+    # proxies que comprimen) y '*' coincide con cualquier representación
+    client_etags = [
+        tag[2:] if tag.startswith('W/') else tag
+        for tag in parse_etags(request.headers.get('If-None-Match', ''))
+    ]
+    if etag in client_etags or '*' in client_etags:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    content = get_cached_report(digest)
+    if content is None:
+        fecha_hora = datetime.datetime.now().isoformat()
+        buf = generate_movements_pdf(rows, columns, title, fecha_hora, None)
+        content = buf.read()
+        buf.close()
+        cache_report(tipo, movement.id, digest, content)
+
+    response = HttpResponse(content, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="movimiento_{movement.id}.pdf"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 @require_GET
 def download_product_movement_by_id(request, product_id):
     try:
         movement = ProductMovement.objects.get(id=product_id)
-        
-        columns = ['ID','Producto','Usuario','Tipo','Stock','Comentario','Fecha Creación','Fecha Modificación']
-        rows = [[
-            movement.id,
-            movement.product_name,
-            movement.user_name,
-            movement.modificationType,
-            movement.modifiedStock,
-            movement.comentary,
-            movement.dateHourCreation.strftime('%Y/%m/%d') if movement.dateHourCreation else '',
-            movement.dateHourUpdate.strftime('%Y/%m/%d') if movement.dateHourUpdate else ''
-        ]]
-
-        title = "Movimiento de Producto"
-        fecha_hora = datetime.datetime.now().isoformat()
-
-        buf = generate_movements_pdf(rows, columns, title, fecha_hora, None)
-        return FileResponse(buf, as_attachment=True, filename=f'movimiento_{movement.id}.pdf')
+        return movement_report_response(
+            request, 'productos', movement, movement.product_name, 'Producto', "Movimiento de Producto"
+        )
 
     except ProductMovement.DoesNotExist:
-        return Response({'error': 'Movimiento no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return JsonResponse({'error': 'Movimiento no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return JsonResponse({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @require_GET
 def download_supply_movement_by_id(request, supply_id):
     try:
         movement = SupplyMovement.objects.get(id=supply_id)
-
-        columns = ['ID','Insumo','Usuario','Tipo','Stock','Comentario','Fecha Creación','Fecha Modificación']
-        rows = [[
-            movement.id,
-            movement.supply_name,
-            movement.user_name,
-            movement.modificationType,
-            movement.modifiedStock,
-            movement.comentary,
-            movement.dateHourCreation.strftime('%Y/%m/%d') if movement.dateHourCreation else '',
-            movement.dateHourUpdate.strftime('%Y/%m/%d') if movement.dateHourUpdate else ''
-        ]]
-
-        title = "Movimiento de Insumo"
-        fecha_hora = datetime.datetime.now().isoformat()
-
-        buf = generate_movements_pdf(rows, columns, title, fecha_hora, None)
-        return FileResponse(buf, as_attachment=True, filename=f'movimiento_{movement.id}.pdf')
+        return movement_report_response(
+            request, 'insumos', movement, movement.supply_name, 'Insumo', "Movimiento de Insumo"
+        )
 
     except SupplyMovement.DoesNotExist:
-        return Response({'error': 'Movimiento no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return JsonResponse({'error': 'Movimiento no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .backends import install_search_indexes_on_migrate
+        post_migrate.connect(install_search_indexes_on_migrate, sender=self)
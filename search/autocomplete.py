@@ -0,0 +1,108 @@
+import time
+from bisect import bisect_left
+
+from picm_rest import versions
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+# Sin cache compartido las invalidaciones de otros procesos no llegan: el
+# índice se reconstruye igualmente pasados estos segundos
+AUTOCOMPLETE_LOCAL_MAX_AGE = 60
+
+# Modelo -> (versión con la que se construyó, momento de construcción, índice).
+# Vive en memoria de cada worker; la versión compartida en cache indica cuándo
+# hay que reconstruirlo.
+_indexes = {}
+
+
+def _names_table(Model):
+    # Versión lógica propia de los nombres: los cambios de stock o precio
+    # incrementan la de la tabla pero no obligan a reconstruir el índice
+    return f"{Model.version_table}_names"
+
+
+def get_autocomplete_version(Model):
+    table = _names_table(Model)
+    return versions.get_versions(table)[table]
+
+
+def invalidate_autocomplete(Model):
+    """
+    Marca como vencido el índice de Model en todos los workers. El incremento
+    se difiere al commit para que nadie reconstruya con datos que aún no son
+    visibles.
+    """
+    versions.bump_versions(_names_table(Model))
+
+
+class PrefixIndex:
+    """
+    Listas ordenadas de (clave en minúsculas, nombre) sobre las que un prefijo
+    se resuelve con bisect: O(log n) para ubicar el rango y O(limit) para
+    recorrerlo. Además del nombre completo se indexa cada palabra posterior a
+    la primera, para que "torn" encuentre "Super Tornillo"; esas coincidencias
+    van después de las de inicio de nombre.
+    """
+
+    def __init__(self, names):
+        starts = []
+        words = []
+        for name in set(names):
+            key = name.casefold()
+            starts.append((key, name))
+            position = key.find(' ')
+            while position != -1:
+                words.append((key[position + 1:], name))
+                position = key.find(' ', position + 1)
+        starts.sort()
+        words.sort()
+        self.starts = starts
+        self.words = words
+
+    @staticmethod
+    def _scan(entries, prefix, limit, found):
+        index = bisect_left(entries, (prefix,))
+        while index < len(entries) and len(found) < limit:
+            key, name = entries[index]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(name, None)
+            index += 1
+
+    def lookup(self, prefix, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        # dict conserva el orden de inserción y evita repetir nombres
+        found = {}
+        self._scan(self.starts, prefix, limit, found)
+        self._scan(self.words, prefix, limit, found)
+        return list(found)
+
+
+def get_prefix_index(Model):
+    """
+    Devuelve el índice de nombres activos de Model, reconstruyéndolo de forma
+    perezosa si la versión compartida cambió desde la última construcción.
+    """
+    version = get_autocomplete_version(Model)
+    built = _indexes.get(Model)
+    now = time.monotonic()
+    if (built is None or built[0] != version
+            or (not versions.shared_cache() and now - built[1] > AUTOCOMPLETE_LOCAL_MAX_AGE)):
+        names = Model.objects.filter(status=True).values_list('name', flat=True)
+        built = (version, now, PrefixIndex(names.iterator()))
+        _indexes[Model] = built
+    return built[2]
+
+
+def autocomplete(Model, prefix, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+    return get_prefix_index(Model).lookup(prefix, limit)
+
+
+def parse_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return AUTOCOMPLETE_DEFAULT_LIMIT
+    return max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
@@ -0,0 +1,143 @@
+import logging
+
+from django.db import connections, DatabaseError, DEFAULT_DB_ALIAS
+from django.db.models import Case, When, Value, IntegerField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+
+from products.models import Product
+from supplies.models import Supplies
+
+logger = logging.getLogger(__name__)
+
+# Modelo -> tabla espejo FTS5 (solo SQLite). Se indexa únicamente el nombre,
+# que es el campo que filtran get_product y get_supplies.
+SEARCH_MODELS = {
+    Product: 'search_product_fts',
+    Supplies: 'search_supplies_fts',
+}
+
+# El tokenizador trigram de FTS5 no encuentra términos de menos de 3 caracteres;
+# para esos se usa icontains (con pocos caracteres casi todo coincide igual).
+MIN_TRIGRAM_LENGTH = 3
+
+# Alias de conexión con las tablas FTS5 ya encontradas. Solo se recuerda el
+# resultado positivo: si el worker arrancó antes de setup_search o del
+# post_migrate, se vuelve a comprobar en la siguiente búsqueda.
+_fts_available = set()
+
+
+def _trigram_index_name(Model):
+    return f"{Model._meta.db_table}_name_trgm_idx"
+
+
+def _install_postgresql(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for Model in SEARCH_MODELS:
+            # Misma expresión que genera icontains (UPPER(name::text) LIKE UPPER(%s)),
+            # así el filtro existente usa el índice GIN sin cambiar la consulta.
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {_trigram_index_name(Model)} '
+                f'ON {Model._meta.db_table} USING gin (UPPER(name::text) gin_trgm_ops)'
+            )
+
+
+def _install_sqlite(connection, rebuild):
+    with connection.cursor() as cursor:
+        for Model, fts_table in SEARCH_MODELS.items():
+            table = Model._meta.db_table
+            # Tabla de contenido externo: guarda solo el índice, el texto se lee de la tabla original
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+                f"name, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+            # Los triggers mantienen el índice al día con cualquier escritura,
+            # incluidas bulk_create y QuerySet.update, que no emiten señales.
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts_table}(rowid, name) VALUES (new.id, new.name); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts_table}({fts_table}, rowid, name) VALUES ('delete', old.id, old.name); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF name ON {table} BEGIN "
+                f"INSERT INTO {fts_table}({fts_table}, rowid, name) VALUES ('delete', old.id, old.name); "
+                f"INSERT INTO {fts_table}(rowid, name) VALUES (new.id, new.name); END"
+            )
+            if rebuild:
+                cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def install_search_indexes(using=DEFAULT_DB_ALIAS, rebuild=True):
+    """
+    Crea los índices de búsqueda según el motor: índices GIN pg_trgm en
+    PostgreSQL y tablas espejo FTS5 (tokenizador trigram) con triggers en
+    SQLite. Es idempotente. Devuelve False si el motor no lo soporta o la
+    creación falla; en ese caso la búsqueda sigue funcionando con icontains.
+    """
+    connection = connections[using]
+    _fts_available.discard(using)
+    try:
+        if connection.vendor == 'postgresql':
+            _install_postgresql(connection)
+        elif connection.vendor == 'sqlite':
+            _install_sqlite(connection, rebuild)
+        else:
+            return False
+    except DatabaseError as e:
+        logger.warning(f"No se pudieron crear los índices de búsqueda: {e}")
+        return False
+    return True
+
+
+def install_search_indexes_on_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    install_search_indexes(using=using)
+
+
+def _has_fts(connection):
+    if connection.alias in _fts_available:
+        return True
+    tables = set(connection.introspection.table_names())
+    if all(t in tables for t in SEARCH_MODELS.values()):
+        _fts_available.add(connection.alias)
+        return True
+    return False
+
+
+def search_queryset(queryset, term):
+    """
+    Filtra queryset (de Product o Supplies) por nombre y lo anota con
+    search_rank: 0 coincidencia exacta, 1 prefijo, 2 resto. Ordena por
+    relevancia y, a igual relevancia, por nombre más corto.
+
+    En SQLite con FTS5 el filtro es un MATCH sobre la tabla espejo; en
+    PostgreSQL es el mismo icontains de siempre, acelerado por el índice
+    pg_trgm. Sin índices disponibles se comporta como icontains.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+
+    connection = connections[queryset.db]
+    fts_table = SEARCH_MODELS.get(queryset.model)
+    if (connection.vendor == 'sqlite' and fts_table and len(term) >= MIN_TRIGRAM_LENGTH
+            and _has_fts(connection)):
+        # Frase entre comillas: subcadena literal, sin operadores de FTS5
+        match = '"' + term.replace('"', '""') + '"'
+        queryset = queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s", (match,))
+        )
+    else:
+        queryset = queryset.filter(name__icontains=term)
+
+    return queryset.annotate(
+        search_rank=Case(
+            When(name__iexact=term, then=Value(0)),
+            When(name__istartswith=term, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField()
+        )
+    ).order_by('search_rank', Length('name'), 'id')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from search.backends import install_search_indexes
+
+
+class Command(BaseCommand):
+    help = ("Crea (o reconstruye) los índices de búsqueda de productos e insumos: "
+            "pg_trgm en PostgreSQL, FTS5 en SQLite. También se ejecuta tras migrate.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        vendor = connections[using].vendor
+        if not install_search_indexes(using=using):
+            raise CommandError(f"No se pudieron crear los índices de búsqueda en {vendor}; "
+                               f"la búsqueda seguirá usando icontains")
+        self.stdout.write(self.style.SUCCESS(f"Índices de búsqueda listos ({vendor})"))
@@ -0,0 +1 @@
+# Sin modelos propios: las tablas e índices de búsqueda se crean en post_migrate
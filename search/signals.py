@@ -0,0 +1,39 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from products.models import Product
+from supplies.models import Supplies
+from .autocomplete import invalidate_autocomplete
+
+# Campos que determinan el contenido del índice (solo nombres de ítems activos)
+INDEXED_FIELDS = ('name', 'status')
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=Supplies)
+def detect_indexed_change(sender, instance, update_fields=None, **kwargs):
+    # Cambios de stock o precio no deben tirar el índice: solo se marca la
+    # instancia si cambia el nombre o el estado respecto de lo guardado
+    if instance.pk is None:
+        instance._autocomplete_changed = True
+        return
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        instance._autocomplete_changed = False
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).values_list(*INDEXED_FIELDS).first()
+    current = tuple(sender._meta.get_field(field).to_python(getattr(instance, field)) for field in INDEXED_FIELDS)
+    instance._autocomplete_changed = stored != current
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Supplies)
+def invalidate_autocomplete_on_save(sender, instance, **kwargs):
+    if getattr(instance, '_autocomplete_changed', True):
+        invalidate_autocomplete(sender)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Supplies)
+def invalidate_autocomplete_on_delete(sender, instance, **kwargs):
+    if instance.status:
+        invalidate_autocomplete(sender)
@@ -0,0 +1,136 @@
+import math
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from picm_rest import versions
+
+# Segundos que un request espera a que otro worker termine de recalcular una
+# clave fría antes de calcularla por su cuenta.
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+# Factor del refresco anticipado probabilístico (XFetch). Valores > 1 adelantan
+# el recálculo, valores < 1 lo retrasan.
+EARLY_REFRESH_BETA = 1.0
+
+# Locks de recálculo que ganó este hilo: clave de cache -> (token, inicio). Solo
+# quien tiene el token puede liberar el lock en set_cached_stats.
+_owned_locks = threading.local()
+
+
+def invalidate_stats():
+    """
+    Invalida todas las estadísticas cacheadas cuando cambian datos que no
+    pasan por las tablas versionadas (por ejemplo, los rollups). El
+    incremento se difiere al commit, como el de las tablas.
+    """
+    versions.bump_versions(versions.STATS)
+
+
+def stats_cache_key(name, *parts):
+    # Las estadísticas no dependen del usuario: la clave se comparte entre
+    # todos y cambia con la versión de cualquier tabla de la que derivan
+    suffix = "_".join(str(part) for part in parts)
+    return f"stats_{versions.versions_key(*versions.STATS_TABLES)}_{name}_{suffix}"
+
+
+def _lock_key(cache_key):
+    return f"{cache_key}_lock"
+
+
+def _owned():
+    if not hasattr(_owned_locks, 'locks'):
+        _owned_locks.locks = {}
+    return _owned_locks.locks
+
+
+def _acquire_lock(cache_key):
+    # cache.add es atómico tanto en Redis como en locmem: solo un worker gana.
+    # El valor lleva un token único para reconocer al dueño al liberarlo.
+    token = uuid.uuid4().hex
+    started = time.time()
+    if not cache.add(_lock_key(cache_key), token, settings.STATS_CACHE_LOCK_TIMEOUT):
+        return False
+    _owned()[cache_key] = (token, started)
+    return True
+
+
+def _release_lock(cache_key):
+    """
+    Libera el lock solo si este hilo lo adquirió y sigue siendo suyo (pudo
+    vencer y pasar a otro worker). Devuelve el inicio del recálculo o None.
+    """
+    owned = _owned().pop(cache_key, None)
+    if owned is None:
+        return None
+    token, started = owned
+    if cache.get(_lock_key(cache_key)) == token:
+        cache.delete(_lock_key(cache_key))
+    return started
+
+
+def _should_refresh_early(entry, now):
+    # XFetch: cuanto más cerca de expirar y más caro de calcular, más probable
+    # es que este request se adelante a recalcular.
+    jitter = entry['delta'] * EARLY_REFRESH_BETA * math.log(1.0 - random.random())
+    return now - jitter >= entry['expires']
+
+
+def get_cached_stats(cache_key):
+    """
+    Devuelve el valor cacheado o None si el llamador debe recalcularlo.
+
+    Solo un worker recibe None por clave (single-flight); mientras recalcula,
+    los demás reciben el valor vencido o esperan brevemente a que aparezca.
+    Quien recibe None debe llamar a set_cached_stats con el resultado.
+    """
+    entry = cache.get(cache_key)
+    now = time.time()
+
+    if entry is not None:
+        if not _should_refresh_early(entry, now):
+            return entry['value']
+        if _acquire_lock(cache_key):
+            return None
+        return entry['value']
+
+    if _acquire_lock(cache_key):
+        return None
+
+    deadline = now + LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return entry['value']
+
+    # El worker que tenía el lock tardó demasiado: se calcula sin esperar más
+    return None
+
+
+def stats_cache_timeout():
+    # Sin cache compartido las versiones no ven las escrituras de otros
+    # procesos: solo un TTL corto acota lo desactualizado de las estadísticas
+    if versions.shared_cache():
+        return settings.STATS_CACHE_TIMEOUT
+    return settings.STATS_CACHE_LOCAL_TIMEOUT
+
+
+def set_cached_stats(cache_key, data):
+    now = time.time()
+    # Quien se cansó de esperar y calculó sin el lock no lo libera: es de otro
+    started = _release_lock(cache_key)
+    timeout = stats_cache_timeout()
+    entry = {
+        'value': data,
+        'expires': now + timeout,
+        'delta': now - started if started else 0,
+    }
+    # La entrada física vive más que la lógica para poder servirla vencida
+    # mientras otro worker la recalcula.
+    cache.set(cache_key, entry, timeout + settings.STATS_CACHE_STALE_TIMEOUT)
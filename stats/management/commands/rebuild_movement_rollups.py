@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from movements.models import ProductMovement, SupplyMovement
+from stats.models import DailyMovementRollup
+from stats.cache import invalidate_stats
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero la tabla de rollups diarios a partir de los movimientos activos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            deleted, _ = DailyMovementRollup.objects.all().delete()
+            self.stdout.write(f"Rollups eliminados: {deleted}")
+
+            for Model, item_field in ((ProductMovement, 'product_id'), (SupplyMovement, 'supply_id')):
+                grouped = Model.objects.filter(status=True).annotate(
+                    day=TruncDate('dateHourCreation')
+                ).values(
+                    'day', item_field, 'modificationType'
+                ).annotate(
+                    movement_count=Count('id'),
+                    quantity=Sum('modifiedStock')
+                ).order_by()
+
+                created = 0
+                batch = []
+                for row in grouped.iterator(chunk_size=batch_size):
+                    batch.append(DailyMovementRollup(**row))
+                    if len(batch) >= batch_size:
+                        DailyMovementRollup.objects.bulk_create(batch)
+                        created += len(batch)
+                        batch = []
+                if batch:
+                    DailyMovementRollup.objects.bulk_create(batch)
+                    created += len(batch)
+
+                self.stdout.write(f"{Model.__name__}: {created} rollups creados")
+
+            invalidate_stats()
+
+        self.stdout.write(self.style.SUCCESS("Rollups reconstruidos correctamente"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from picm_rest import versions
+from stats.cache import invalidate_stats
+from stats.models import InventoryTotals
+from stats.totals import compute_totals
+
+
+class Command(BaseCommand):
+    help = "Compara la fila de totales de inventario con los agregados reales y corrige las diferencias."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Solo informa las diferencias, sin corregirlas")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # El bloqueo frena las escrituras que aplican deltas mientras se recalcula
+            totals, _ = InventoryTotals.objects.select_for_update().get_or_create(pk=InventoryTotals.SINGLETON_ID)
+            actual = compute_totals()
+
+            drift = {
+                field: (getattr(totals, field), value)
+                for field, value in actual.items()
+                if getattr(totals, field) != value
+            }
+            if not drift:
+                self.stdout.write(self.style.SUCCESS("Los totales de inventario están al día"))
+                return
+
+            for field, (stored, value) in drift.items():
+                self.stdout.write(self.style.WARNING(f"{field}: guardado {stored}, real {value}"))
+
+            if options['dry_run']:
+                self.stdout.write("Simulación: no se corrigió nada")
+                return
+
+            for field, value in actual.items():
+                setattr(totals, field, value)
+            totals.save()
+            # InventoryTotals no está versionada: los ETag de los totales y las
+            # estadísticas cacheadas se invalidan a mano (ambos al hacer commit)
+            versions.bump_versions(versions.PRODUCTS, versions.SUPPLIES)
+            invalidate_stats()
+
+        self.stdout.write(self.style.SUCCESS(f"Totales corregidos ({len(drift)} campos)"))
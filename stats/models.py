@@ -1,3 +1,67 @@
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+
+# Daily Movement Rollup Model
+# Pre-aggregated ledger: one row per day, per item and per modificationType.
+# Kept current by stats.rollup and rebuilt with `manage.py rebuild_movement_rollups`.
+
+class DailyMovementRollup(models.Model):
+    day = models.DateField()
+    product = models.ForeignKey(
+        'products.Product',
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+        null=True,
+        blank=True
+    )
+    supply = models.ForeignKey(
+        'supplies.Supplies',
+        on_delete=models.CASCADE,
+        related_name='daily_rollups',
+        null=True,
+        blank=True
+    )
+    modificationType = models.CharField(max_length=15)
+    movement_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'product', 'modificationType'],
+                condition=Q(product__isnull=False),
+                name='unique_product_daily_rollup'
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'supply', 'modificationType'],
+                condition=Q(supply__isnull=False),
+                name='unique_supply_daily_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['modificationType', 'day'], name='rollup_type_day_idx'),
+        ]
+
+    def __str__(self):
+        item = f"Product {self.product_id}" if self.product_id else f"Supply {self.supply_id}"
+        return f"Rollup {self.day} - {item} - Type: {self.modificationType} - Quantity: {self.quantity}"
+
+
+# Inventory Totals Model
+# Singleton row (id=1) with the totals the total-stock endpoints report.
+# Kept current by stats.totals from the write paths and repaired with
+# `manage.py reconcile_totals`.
+
+class InventoryTotals(models.Model):
+    SINGLETON_ID = 1
+
+    product_count = models.IntegerField(default=0)
+    product_stock_value = models.DecimalField(max_digits=30, decimal_places=2, default=0)
+    supply_count = models.IntegerField(default=0)
+    supply_stock_value = models.DecimalField(max_digits=30, decimal_places=2, default=0)
+    dateHourUpdate = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return (f"Totals - Products: {self.product_count} ({self.product_stock_value}) - "
+                f"Supplies: {self.supply_count} ({self.supply_stock_value})")
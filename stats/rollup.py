@@ -0,0 +1,129 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from movements.models import ProductMovement
+from .models import DailyMovementRollup
+from .cache import invalidate_stats
+
+
+def _movement_day(movement):
+    created = movement.dateHourCreation or timezone.now()
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return timezone.localtime(created).date()
+
+
+def _rollup_lookup(movement):
+    item_field = 'product_id' if isinstance(movement, ProductMovement) else 'supply_id'
+    return (
+        _movement_day(movement),
+        item_field,
+        getattr(movement, item_field),
+        movement.modificationType,
+    )
+
+
+def _apply_delta(lookup, count, quantity):
+    updated = DailyMovementRollup.objects.filter(**lookup).update(
+        movement_count=F('movement_count') + count,
+        quantity=F('quantity') + quantity
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DailyMovementRollup.objects.create(
+                movement_count=count,
+                quantity=quantity,
+                **lookup
+            )
+    except IntegrityError:
+        # Otro worker creó la fila entre el UPDATE y el INSERT
+        DailyMovementRollup.objects.filter(**lookup).update(
+            movement_count=F('movement_count') + count,
+            quantity=F('quantity') + quantity
+        )
+
+
+def _apply_group(day, item_field, modification_type, item_deltas):
+    """
+    Aplica los deltas de muchos ítems del mismo día y tipo con un SELECT ...
+    FOR UPDATE, un bulk_update y un bulk_create, en lugar de un UPDATE por ítem.
+    """
+    existing = DailyMovementRollup.objects.select_for_update().filter(
+        day=day,
+        modificationType=modification_type,
+        **{f'{item_field}__in': list(item_deltas)}
+    )
+    pending = dict(item_deltas)
+    to_update = []
+    for rollup in existing:
+        count, quantity = pending.pop(getattr(rollup, item_field))
+        rollup.movement_count += count
+        rollup.quantity += quantity
+        to_update.append(rollup)
+    if to_update:
+        DailyMovementRollup.objects.bulk_update(to_update, ['movement_count', 'quantity'], batch_size=500)
+
+    if not pending:
+        return
+    try:
+        with transaction.atomic():
+            DailyMovementRollup.objects.bulk_create([
+                DailyMovementRollup(
+                    day=day,
+                    modificationType=modification_type,
+                    movement_count=count,
+                    quantity=quantity,
+                    **{item_field: item_id}
+                )
+                for item_id, (count, quantity) in pending.items()
+            ], batch_size=500)
+    except IntegrityError:
+        # Alguna fila apareció de forma concurrente: se cae al camino por clave
+        for item_id, (count, quantity) in pending.items():
+            lookup = {'day': day, item_field: item_id, 'modificationType': modification_type}
+            _apply_delta(lookup, count, quantity)
+
+
+def apply_movements(movements, sign=1):
+    """
+    Suma (sign=1) o resta (sign=-1) los movimientos activos a la tabla de
+    rollups diarios. Los movimientos se agrupan antes de escribir: una sola
+    combinación día/ítem/tipo cuesta un UPDATE, y los lotes grandes se
+    escriben por grupos de día y tipo con operaciones masivas.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for movement in movements:
+        if not movement.status:
+            continue
+        delta = deltas[_rollup_lookup(movement)]
+        delta[0] += sign
+        delta[1] += sign * int(movement.modifiedStock)
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        if len(deltas) == 1:
+            (day, item_field, item_id, modification_type), (count, quantity) = next(iter(deltas.items()))
+            _apply_delta({'day': day, item_field: item_id, 'modificationType': modification_type}, count, quantity)
+        else:
+            groups = defaultdict(dict)
+            for (day, item_field, item_id, modification_type), delta in deltas.items():
+                groups[(day, item_field, modification_type)][item_id] = tuple(delta)
+            for (day, item_field, modification_type), item_deltas in groups.items():
+                _apply_group(day, item_field, modification_type, item_deltas)
+
+    invalidate_stats()
+
+
+def record_movement(movement):
+    apply_movements([movement], sign=1)
+
+
+def discard_movement(movement):
+    apply_movements([movement], sign=-1)
@@ -26,8 +26,10 @@ class ProductMovementsVolumeSerializer(serializers.Serializer):
 
 
 class MonthlyMovementsSerializer(serializers.Serializer):
-    month = serializers.CharField()
-    month_number = serializers.IntegerField()
+    period = serializers.DateField()
+    # Solo con granularity=month
+    month = serializers.CharField(required=False)
+    month_number = serializers.IntegerField(required=False)
     entries = serializers.IntegerField()
     sales = serializers.IntegerField()
     net_movement = serializers.IntegerField()
@@ -36,6 +38,7 @@ class MonthlyMovementsSerializer(serializers.Serializer):
 class MonthlyMovementsResponseSerializer(serializers.Serializer):
     data = MonthlyMovementsSerializer(many=True)
     year = serializers.IntegerField()
+    granularity = serializers.CharField()
     total_entries = serializers.IntegerField()
     total_sales = serializers.IntegerField()
 
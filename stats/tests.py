@@ -0,0 +1,110 @@
+import io
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import Product, Category
+from .models import DailyMovementRollup, InventoryTotals
+from .totals import get_totals
+
+
+class TopProductsQueryCountTests(TestCase):
+    """
+    Los tops de productos resuelven las categorías de todo el top-N en una
+    sola consulta: el total no depende de limit (una para el rollup y otra
+    para las categorías).
+    """
+
+    PRODUCTS = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stats_tester', password='x')
+        categories = [
+            Category.objects.create(name=f'Categoría {number}', description='Categoría de prueba')
+            for number in range(3)
+        ]
+        today = timezone.localdate()
+        rollups = []
+        for number in range(cls.PRODUCTS):
+            product = Product.objects.create(
+                name=f'Producto {number}', description='Producto de prueba', price='10.00', stock=100
+            )
+            product.category.set(categories)
+            for modification_type in ('Salida', 'Entrada'):
+                rollups.append(DailyMovementRollup(
+                    day=today,
+                    product=product,
+                    modificationType=modification_type,
+                    movement_count=1,
+                    quantity=number + 1
+                ))
+        DailyMovementRollup.objects.bulk_create(rollups)
+
+    def setUp(self):
+        # Cache vacío: cada request debe calcular el top completo
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_top_queries(self, url):
+        for limit in (5, 30):
+            with self.subTest(url=url, limit=limit):
+                with self.assertNumQueries(2):
+                    response = self.client.get(url, {'limit': limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['data']), limit)
+                for item in response.data['data']:
+                    self.assertEqual(item['category_name'], 'Categoría 0, Categoría 1, Categoría 2')
+
+    def test_top_products_sales_query_count(self):
+        self.assert_top_queries('/api/statistics/top-products-sales/')
+
+    def test_top_products_entries_query_count(self):
+        self.assert_top_queries('/api/statistics/top-products-entries/')
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': tempfile.mkdtemp(),
+}})
+class ReconcileTotalsInvalidationTests(TestCase):
+    """
+    reconcile_totals corrige la fila con save(), fuera de las tablas
+    versionadas: debe invalidar igual los ETag y las estadísticas cacheadas.
+    Los ETag solo se emiten con un cache compartido, de ahí el cache en disco.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('reconcile_tester', password='x'))
+        Product.objects.create(name='Tornillo', description='Producto de prueba', price='10.00', stock=5)
+        get_totals()
+        # Deriva: la fila queda desfasada sin pasar por ninguna escritura versionada
+        InventoryTotals.objects.filter(pk=InventoryTotals.SINGLETON_ID).update(product_stock_value=0)
+
+    def test_reconcile_invalidates_etags_and_stats_cache(self):
+        total = self.client.get('/api/products/total-stock-value')
+        dashboard = self.client.get('/api/statistics/dashboard/')
+        self.assertEqual(total.data['total_stock_value'], Decimal('0'))
+        self.assertEqual(dashboard.data['totals']['total_stock_value'], Decimal('0'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_totals', stdout=io.StringIO())
+
+        total_after = self.client.get('/api/products/total-stock-value', HTTP_IF_NONE_MATCH=total['ETag'])
+        self.assertEqual(total_after.status_code, 200)
+        self.assertNotEqual(total_after['ETag'], total['ETag'])
+        self.assertEqual(total_after.data['total_stock_value'], Decimal('50.00'))
+
+        dashboard_after = self.client.get('/api/statistics/dashboard/', HTTP_IF_NONE_MATCH=dashboard['ETag'])
+        self.assertEqual(dashboard_after.status_code, 200)
+        self.assertNotEqual(dashboard_after['ETag'], dashboard['ETag'])
+        self.assertEqual(dashboard_after.data['totals']['total_stock_value'], Decimal('50.00'))
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from products.models import Product
+from supplies.models import Supplies
+from .models import InventoryTotals
+
+# Modelo de ítem -> (campo de precio, campo de conteo, campo de valor en InventoryTotals)
+TOTAL_FIELDS = {
+    Product: ('price', 'product_count', 'product_stock_value'),
+    Supplies: ('unitaryPrice', 'supply_count', 'supply_stock_value'),
+}
+
+
+def compute_totals():
+    """Totales calculados desde cero con los agregados de los modelos."""
+    return {
+        'product_count': Product.calculateTotalProducts(),
+        'product_stock_value': Decimal(Product.calculateTotalStock()),
+        'supply_count': Supplies.calculate_total_supplies(),
+        'supply_stock_value': Decimal(Supplies.calculate_total_inventory_value()),
+    }
+
+
+def get_totals():
+    """
+    Devuelve la fila de totales. Si aún no existe se crea a partir de los
+    agregados completos, lo que solo ocurre una vez.
+    """
+    totals = InventoryTotals.objects.filter(pk=InventoryTotals.SINGLETON_ID).first()
+    if totals is None:
+        try:
+            with transaction.atomic():
+                totals = InventoryTotals.objects.create(pk=InventoryTotals.SINGLETON_ID, **compute_totals())
+        except IntegrityError:
+            totals = InventoryTotals.objects.get(pk=InventoryTotals.SINGLETON_ID)
+    return totals
+
+
+def contribution(item):
+    """(conteo, valor) con que un ítem aporta a los totales: solo los activos cuentan."""
+    if item is None or not item.status:
+        return 0, Decimal(0)
+    price_field = TOTAL_FIELDS[type(item)][0]
+    return 1, Decimal(str(getattr(item, price_field))) * int(item.stock)
+
+
+def apply_totals(Model, count=0, value=0):
+    """
+    Suma los deltas a la fila de totales con un UPDATE atómico (F()). Debe
+    llamarse en la misma transacción que la escritura que lo origina.
+    """
+    if not count and not value:
+        return
+    _, count_field, value_field = TOTAL_FIELDS[Model]
+    updated = InventoryTotals.objects.filter(pk=InventoryTotals.SINGLETON_ID).update(**{
+        count_field: F(count_field) + count,
+        value_field: F(value_field) + value,
+    })
+    if not updated:
+        # Sin fila aún: se crea desde los agregados, que ya incluyen esta escritura
+        get_totals()
+
+
+def record_item_change(before, after):
+    """
+    Aplica la diferencia entre el aporte de un ítem antes y después de una
+    escritura. before es None en las altas; after es None en los borrados.
+    """
+    Model = type(after if after is not None else before)
+    count_before, value_before = contribution(before)
+    count_after, value_after = contribution(after)
+    apply_totals(Model, count_after - count_before, value_after - value_before)
@@ -15,4 +15,5 @@ urlpatterns = [
     # GENERAL STATS ENDPOINTS
     path('monthly-movements/', views.MonthlyMovementsView.as_view(), name='monthly-movements'),
     path('category-distribution/', views.CategoryDistributionView.as_view(), name='category-distribution'),
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
 ]
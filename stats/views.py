@@ -2,30 +2,31 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.db.models import Sum, Count, Q, F
+from django.db.models import (
+    Sum, Q, F, Value, OuterRef, Subquery, DecimalField, IntegerField
+)
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek, TruncMonth
 from django.utils import timezone
-from datetime import datetime, timedelta
-import pytz
-from django.core.cache import cache
+from datetime import date, timedelta
+from collections import defaultdict
+from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.utils.decorators import method_decorator
 import logging
 
-from movements.models import ProductMovement, SupplyMovement
 from products.models import Product, Category
-from supplies.models import Supplies, Supplier
-from .serializers import (
-    TopProductsSalesSerializer,
-    TopProductsEntriesSerializer,
-    ProductMovementsVolumeSerializer,
-    MonthlyMovementsResponseSerializer,
-    TopSuppliesSalesSerializer,
-    TopSuppliesEntriesSerializer,
-    SupplyMovementsVolumeSerializer,
-    CategoryDistributionResponseSerializer
-)
+from supplies.models import Supplier
+from .models import DailyMovementRollup
+from .totals import get_totals
+from picm_rest import versions
+from picm_rest.conditional import conditional_get
+from .cache import stats_cache_key, get_cached_stats, set_cached_stats
 
 logger = logging.getLogger(__name__)
 
+# Las estadísticas dependen de todas las tablas y de la fecha (períodos relativos a hoy)
+stats_conditional_get = method_decorator(conditional_get(*versions.STATS_TABLES, daily=True), name='get')
+
 
 class StatisticsBaseView(APIView):
     permission_classes = [IsAuthenticated]
@@ -41,6 +42,22 @@ class StatisticsBaseView(APIView):
         }
         
         return period_mapping.get(period, period_mapping['30d'])
+
+    def get_rollup_start(self, period):
+        return timezone.localtime(self.get_date_filter(period)).date()
+
+    def get_category_names(self, product_ids):
+        # Una sola consulta sobre la tabla intermedia para todo el top-N
+        categories = defaultdict(list)
+        rows = Product.category.through.objects.filter(
+            product_id__in=product_ids
+        ).order_by('id').values_list('product_id', 'category__name')
+        for product_id, category_name in rows:
+            categories[product_id].append(category_name)
+        return {
+            product_id: ", ".join(names)
+            for product_id, names in categories.items()
+        }
     
     def validate_period(self, period):
         valid_periods = ['7d', '30d', '90d', '1y']
@@ -57,54 +74,57 @@ class StatisticsBaseView(APIView):
             raise ValidationError("El límite debe ser un número entero válido")
 
 
+@stats_conditional_get
 class TopProductsSalesView(StatisticsBaseView):
     
+    def build_response(self, period, limit, rollup_start):
+        top_products = DailyMovementRollup.objects.filter(
+            modificationType='Salida',
+            product__isnull=False,
+            day__gte=rollup_start
+        ).values(
+            'product__id',
+            'product__name'
+        ).annotate(
+            total_sales=Sum('movement_count'),
+            total_quantity=Sum('quantity')
+        ).order_by('-total_quantity')[:limit]
+
+        top_products = list(top_products)
+        category_names = self.get_category_names([item['product__id'] for item in top_products])
+
+        data = []
+        for item in top_products:
+            data.append({
+                'product_id': item['product__id'],
+                'product_name': item['product__name'],
+                'total_sales': item['total_sales'],
+                'total_quantity': item['total_quantity'],
+                'category_name': category_names.get(item['product__id'], "Sin categoría")
+            })
+
+        response_data = {
+            'data': data,
+            'period': period,
+            'total_products': len(data)
+        }
+        return response_data
+
     def get(self, request):
         try:
             limit = self.validate_limit(request.GET.get('limit', 10))
             period = request.GET.get('period', '30d')
             self.validate_period(period)
             
-            cache_key = f"top_products_sales_{period}_{limit}_{request.user.id}"
+            cache_key = stats_cache_key('top_products_sales', period, limit)
             
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
-            date_filter = self.get_date_filter(period)
-            
-            top_products = ProductMovement.objects.filter(
-                modificationType='Salida',
-                product__isnull=False,
-                dateHourCreation__gte=date_filter,
-                status=True
-            ).select_related('product', 'product__category').values(
-                'product__id',
-                'product__name'
-            ).annotate(
-                total_sales=Count('id'),
-                total_quantity=Sum('modifiedStock')
-            ).order_by('-total_quantity')[:limit]
-        
-            data = []
-            for item in top_products:
-                product = Product.objects.get(id=item['product__id'])
-                categories = product.category.all()
-                category_name = ", ".join([cat.name for cat in categories]) if categories else "Sin categoría"
-                
-                data.append({
-                    'product_id': item['product__id'],
-                    'product_name': item['product__name'],
-                    'total_sales': item['total_sales'],
-                    'total_quantity': item['total_quantity'],
-                    'category_name': category_name
-                })
+            response_data = self.build_response(period, limit, self.get_rollup_start(period))
             
-            response_data = {
-                'data': data,
-                'period': period,
-                'total_products': len(data)
-            }
+            set_cached_stats(cache_key, response_data)
             
             return Response(response_data)
             
@@ -115,54 +135,57 @@ class TopProductsSalesView(StatisticsBaseView):
             return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@stats_conditional_get
 class TopProductsEntriesView(StatisticsBaseView):
     
+    def build_response(self, period, limit, rollup_start):
+        top_products = DailyMovementRollup.objects.filter(
+            modificationType='Entrada',
+            product__isnull=False,
+            day__gte=rollup_start
+        ).values(
+            'product__id',
+            'product__name'
+        ).annotate(
+            total_entries=Sum('movement_count'),
+            total_quantity=Sum('quantity')
+        ).order_by('-total_quantity')[:limit]
+
+        top_products = list(top_products)
+        category_names = self.get_category_names([item['product__id'] for item in top_products])
+
+        data = []
+        for item in top_products:
+            data.append({
+                'product_id': item['product__id'],
+                'product_name': item['product__name'],
+                'total_entries': item['total_entries'],
+                'total_quantity': item['total_quantity'],
+                'category_name': category_names.get(item['product__id'], "Sin categoría")
+            })
+
+        response_data = {
+            'data': data,
+            'period': period,
+            'total_products': len(data)
+        }
+        return response_data
+
     def get(self, request):
         try:
             limit = self.validate_limit(request.GET.get('limit', 10))
             period = request.GET.get('period', '30d')
             self.validate_period(period)
             
-            cache_key = f"top_products_entries_{period}_{limit}_{request.user.id}"
+            cache_key = stats_cache_key('top_products_entries', period, limit)
             
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
-            date_filter = self.get_date_filter(period)
-            
-            top_products = ProductMovement.objects.filter(
-                modificationType='Entrada',
-                product__isnull=False,
-                dateHourCreation__gte=date_filter,
-                status=True
-            ).select_related('product', 'product__category').values(
-                'product__id',
-                'product__name'
-            ).annotate(
-                total_entries=Count('id'),
-                total_quantity=Sum('modifiedStock')
-            ).order_by('-total_quantity')[:limit]
-            
-            data = []
-            for item in top_products:
-                product = Product.objects.get(id=item['product__id'])
-                categories = product.category.all()
-                category_name = ", ".join([cat.name for cat in categories]) if categories else "Sin categoría"
-                
-                data.append({
-                    'product_id': item['product__id'],
-                    'product_name': item['product__name'],
-                    'total_entries': item['total_entries'],
-                    'total_quantity': item['total_quantity'],
-                    'category_name': category_name
-                })
+            response_data = self.build_response(period, limit, self.get_rollup_start(period))
             
-            response_data = {
-                'data': data,
-                'period': period,
-                'total_products': len(data)
-            }
+            set_cached_stats(cache_key, response_data)
             
             return Response(response_data)
             
@@ -173,6 +196,7 @@ class TopProductsEntriesView(StatisticsBaseView):
             return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@stats_conditional_get
 class ProductMovementsVolumeView(StatisticsBaseView):
     
     def get(self, request):
@@ -180,21 +204,21 @@ class ProductMovementsVolumeView(StatisticsBaseView):
             period = request.GET.get('period', '30d')
             self.validate_period(period)
             
-            cache_key = f"product_movements_volume_{period}_{request.user.id}"
+            cache_key = stats_cache_key('product_movements_volume', period)
             
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
-            date_filter = self.get_date_filter(period)
+            rollup_start = self.get_rollup_start(period)
             
-            movements_stats = ProductMovement.objects.filter(
-                dateHourCreation__gte=date_filter,
-                status=True
+            movements_stats = DailyMovementRollup.objects.filter(
+                product__isnull=False,
+                day__gte=rollup_start
             ).aggregate(
-                total_entries=Sum('modifiedStock', filter=Q(modificationType='Entrada')),
-                total_sales=Sum('modifiedStock', filter=Q(modificationType='Salida')),
-                total_movements=Count('id')
+                total_entries=Sum('quantity', filter=Q(modificationType='Entrada')),
+                total_sales=Sum('quantity', filter=Q(modificationType='Salida')),
+                total_movements=Sum('movement_count')
             )
             
             entries = movements_stats['total_entries'] or 0
@@ -210,6 +234,8 @@ class ProductMovementsVolumeView(StatisticsBaseView):
                 'total_movements': total_movements
             }
             
+            set_cached_stats(cache_key, response_data)
+            
             return Response(response_data)
             
         except ValidationError as e:
@@ -219,12 +245,106 @@ class ProductMovementsVolumeView(StatisticsBaseView):
             return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@stats_conditional_get
 class MonthlyMovementsView(StatisticsBaseView):
     
+    month_names = [
+        'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+        'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+    ]
+    
+    truncations = {
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth
+    }
+    
+    def get_periods(self, year, granularity):
+        year_start = date(year, 1, 1)
+        year_end = date(year + 1, 1, 1)
+        
+        if granularity == 'month':
+            return [date(year, month_num, 1) for month_num in range(1, 13)]
+        
+        if granularity == 'week':
+            # La primera semana se recorta al 1 de enero: empieza ese día y no
+            # en el lunes anterior, que pertenece al año previo
+            periods = [year_start]
+            current = year_start + timedelta(days=7 - year_start.weekday())
+            step = timedelta(days=7)
+        else:
+            periods = []
+            current = year_start
+            step = timedelta(days=1)
+        
+        while current < year_end:
+            periods.append(current)
+            current += step
+        return periods
+    
+    def build_response(self, year, movement_type, granularity):
+        periods = self.get_periods(year, granularity)
+        year_start = date(year, 1, 1)
+
+        rollups = DailyMovementRollup.objects.filter(
+            day__gte=year_start,
+            day__lt=date(year + 1, 1, 1)
+        )
+        if movement_type == 'products':
+            rollups = rollups.filter(product__isnull=False)
+        elif movement_type == 'supplies':
+            rollups = rollups.filter(supply__isnull=False)
+
+        # Una sola consulta agrupada; los periodos sin movimientos se rellenan abajo
+        grouped = rollups.annotate(
+            period=self.truncations[granularity]('day')
+        ).values('period').annotate(
+            entries=Sum('quantity', filter=Q(modificationType='Entrada')),
+            sales=Sum('quantity', filter=Q(modificationType='Salida'))
+        ).order_by('period')
+
+        # TruncWeek lleva los primeros días del año al lunes anterior; el filtro
+        # ya excluye el año previo, así que ese grupo es el del 1 de enero
+        stats_by_period = {max(row['period'], year_start): row for row in grouped}
+
+        data = []
+        total_entries = 0
+        total_sales = 0
+
+        for period_start in periods:
+            period_stats = stats_by_period.get(period_start, {})
+            entries = period_stats.get('entries') or 0
+            sales = period_stats.get('sales') or 0
+
+            net_movement = entries - sales
+            total_entries += entries
+            total_sales += sales
+
+            row = {'period': period_start.isoformat()}
+            if granularity == 'month':
+                row['month'] = self.month_names[period_start.month - 1]
+                row['month_number'] = period_start.month
+            row.update({
+                'entries': entries,
+                'sales': sales,
+                'net_movement': net_movement
+            })
+            data.append(row)
+
+        response_data = {
+            'data': data,
+            'year': year,
+            'granularity': granularity,
+            'total_entries': total_entries,
+            'total_sales': total_sales
+        }
+        return response_data
+
     def get(self, request):
         try:
             year = int(request.GET.get('year', timezone.now().year))
             movement_type = request.GET.get('type', 'both')  
+            granularity = request.GET.get('granularity', 'month')
 
             if year < 2020 or year > timezone.now().year + 1:
                 raise ValidationError("Año inválido")
@@ -232,79 +352,22 @@ class MonthlyMovementsView(StatisticsBaseView):
             if movement_type not in ['products', 'supplies', 'both']:
                 raise ValidationError("Tipo debe ser 'products', 'supplies' o 'both'")
             
-            cache_key = f"monthly_movements_{year}_{movement_type}_{request.user.id}"
+            if granularity not in self.truncations:
+                raise ValidationError("Granularidad debe ser 'day', 'week' o 'month'")
+            
+            cache_key = stats_cache_key('monthly_movements', year, movement_type, granularity)
 
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
-            month_names = [
-                'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-                'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
-            ]
-            
-            data = []
-            total_entries = 0
-            total_sales = 0
-            
-            for month_num in range(1, 13):
-                month_start = datetime(year, month_num, 1, tzinfo=pytz.UTC)
-                if month_num == 12:
-                    month_end = datetime(year + 1, 1, 1, tzinfo=pytz.UTC)
-                else:
-                    month_end = datetime(year, month_num + 1, 1, tzinfo=pytz.UTC)
-                
-                entries = 0
-                sales = 0
-                
-                if movement_type in ['products', 'both']:
-                    product_stats = ProductMovement.objects.filter(
-                        dateHourCreation__gte=month_start,
-                        dateHourCreation__lt=month_end,
-                        status=True
-                    ).aggregate(
-                        entries=Sum('modifiedStock', filter=Q(modificationType='Entrada')),
-                        sales=Sum('modifiedStock', filter=Q(modificationType='Salida'))
-                    )
-                    entries += product_stats['entries'] or 0
-                    sales += product_stats['sales'] or 0
-                '''
-                # APPLY LATER
-                 if movement_type in ['supplies', 'both']: 
-                    supply_stats = SupplyMovement.objects.filter(
-                        dateHourCreation__gte=month_start,
-                        dateHourCreation__lt=month_end,
-                        status=True
-                    ).aggregate(
-                        entries=Sum('modifiedStock', filter=Q(modificationType='Entrada')),
-                        sales=Sum('modifiedStock', filter=Q(modificationType='Salida'))
-                    )
-                    entries += supply_stats['entries'] or 0
-                    sales += supply_stats['sales'] or 0
-                '''
-                
-                net_movement = entries - sales
-                total_entries += entries
-                total_sales += sales
-                
-                data.append({
-                    'month': month_names[month_num - 1],
-                    'month_number': month_num,
-                    'entries': entries,
-                    'sales': sales,
-                    'net_movement': net_movement
-                })
+            response_data = self.build_response(year, movement_type, granularity)
             
-            response_data = {
-                'data': data,
-                'year': year,
-                'total_entries': total_entries,
-                'total_sales': total_sales
-            }
+            set_cached_stats(cache_key, response_data)
             
             return Response(response_data)
             
-        except (ValueError, TypeError) as e:
+        except (ValueError, TypeError):
             return Response({'error': 'Parámetros inválidos'}, status=status.HTTP_400_BAD_REQUEST)
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -313,8 +376,40 @@ class MonthlyMovementsView(StatisticsBaseView):
             return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@stats_conditional_get
 class TopSuppliesSalesView(StatisticsBaseView):
     
+    def build_response(self, period, limit, rollup_start):
+        top_supplies = DailyMovementRollup.objects.filter(
+            modificationType='EXIT',
+            supply__isnull=False,
+            day__gte=rollup_start
+        ).values(
+            'supply__id',
+            'supply__name',
+            'supply__supplier__name'
+        ).annotate(
+            total_sales=Sum('movement_count'),
+            total_quantity=Sum('quantity')
+        ).order_by('-total_quantity')[:limit]
+
+        data = []
+        for item in top_supplies:
+            data.append({
+                'supply_id': item['supply__id'],
+                'supply_name': item['supply__name'],
+                'total_sales': item['total_sales'],
+                'total_quantity': item['total_quantity'],
+                'supplier_name': item['supply__supplier__name']
+            })
+
+        response_data = {
+            'data': data,
+            'period': period,
+            'total_supplies': len(data)
+        }
+        return response_data
+
     def get(self, request):
         try:
 
@@ -322,44 +417,15 @@ class TopSuppliesSalesView(StatisticsBaseView):
             period = request.GET.get('period', '30d')
             self.validate_period(period)
             
-            cache_key = f"top_supplies_sales_{period}_{limit}_{request.user.id}"
+            cache_key = stats_cache_key('top_supplies_sales', period, limit)
             
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
-            date_filter = self.get_date_filter(period)
-            
-            top_supplies = SupplyMovement.objects.filter(
-                modificationType='EXIT',
-                supply__isnull=False,
-                dateHourCreation__gte=date_filter,
-                status=True
-            ).select_related('supply', 'supply__supplier').values(
-                'supply__id',
-                'supply__name',
-                'supply__supplier__name'
-            ).annotate(
-                total_sales=Count('id'),
-                total_quantity=Sum('modifiedStock')
-            ).order_by('-total_quantity')[:limit]
-            
-            data = []
-            for item in top_supplies:
-                data.append({
-                    'supply_id': item['supply__id'],
-                    'supply_name': item['supply__name'],
-                    'total_sales': item['total_sales'],
-                    'total_quantity': item['total_quantity'],
-                    'supplier_name': item['supply__supplier__name']
-                })
-            
-            response_data = {
-                'data': data,
-                'period': period,
-                'total_supplies': len(data)
-            }
+            response_data = self.build_response(period, limit, self.get_rollup_start(period))
             
+            set_cached_stats(cache_key, response_data)
             
             return Response(response_data)
             
@@ -369,8 +435,40 @@ class TopSuppliesSalesView(StatisticsBaseView):
             logger.error(f"Error en TopSuppliesSalesView: {str(e)}")
             return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@stats_conditional_get
 class TopSuppliesEntriesView(StatisticsBaseView):
     
+    def build_response(self, period, limit, rollup_start):
+        top_supplies = DailyMovementRollup.objects.filter(
+            modificationType='ENTRY',
+            supply__isnull=False,
+            day__gte=rollup_start
+        ).values(
+            'supply__id',
+            'supply__name',
+            'supply__supplier__name'
+        ).annotate(
+            total_entries=Sum('movement_count'),
+            total_quantity=Sum('quantity')
+        ).order_by('-total_quantity')[:limit]
+
+        data = []
+        for item in top_supplies:
+            data.append({
+                'supply_id': item['supply__id'],
+                'supply_name': item['supply__name'],
+                'total_entries': item['total_entries'],
+                'total_quantity': item['total_quantity'],
+                'supplier_name': item['supply__supplier__name']
+            })
+
+        response_data = {
+            'data': data,
+            'period': period,
+            'total_supplies': len(data)
+        }
+        return response_data
+
     def get(self, request):
         try:
             limit = self.validate_limit(request.GET.get('limit', 10))
@@ -378,49 +476,17 @@ class TopSuppliesEntriesView(StatisticsBaseView):
             self.validate_period(period)
             
            
-            cache_key = f"top_supplies_entries_{period}_{limit}_{request.user.id}"
+            cache_key = stats_cache_key('top_supplies_entries', period, limit)
             
            
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
             
-            date_filter = self.get_date_filter(period)
-            
-           
-            top_supplies = SupplyMovement.objects.filter(
-                modificationType='ENTRY',
-                supply__isnull=False,
-                dateHourCreation__gte=date_filter,
-                status=True
-            ).select_related('supply', 'supply__supplier').values(
-                'supply__id',
-                'supply__name',
-                'supply__supplier__name'
-            ).annotate(
-                total_entries=Count('id'),
-                total_quantity=Sum('modifiedStock')
-            ).order_by('-total_quantity')[:limit]
-            
-            data = []
-            for item in top_supplies:
-                data.append({
-                    'supply_id': item['supply__id'],
-                    'supply_name': item['supply__name'],
-                    'total_entries': item['total_entries'],
-                    'total_quantity': item['total_quantity'],
-                    'supplier_name': item['supply__supplier__name']
-                })
-            
-            response_data = {
-                'data': data,
-                'period': period,
-                'total_supplies': len(data)
-            }
-            
+            response_data = self.build_response(period, limit, self.get_rollup_start(period))
             
-            cache.set(cache_key, response_data, 30)
+            set_cached_stats(cache_key, response_data)
             
             return Response(response_data)
             
@@ -431,6 +497,7 @@ class TopSuppliesEntriesView(StatisticsBaseView):
             return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@stats_conditional_get
 class SupplyMovementsVolumeView(StatisticsBaseView):
     
     
@@ -440,24 +507,24 @@ class SupplyMovementsVolumeView(StatisticsBaseView):
             self.validate_period(period)
             
             
-            cache_key = f"supply_movements_volume_{period}_{request.user.id}"
+            cache_key = stats_cache_key('supply_movements_volume', period)
             
             
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
            
-            date_filter = self.get_date_filter(period)
+            rollup_start = self.get_rollup_start(period)
             
           
-            movements_stats = SupplyMovement.objects.filter(
-                dateHourCreation__gte=date_filter,
-                status=True
+            movements_stats = DailyMovementRollup.objects.filter(
+                supply__isnull=False,
+                day__gte=rollup_start
             ).aggregate(
-                total_entries=Sum('modifiedStock', filter=Q(modificationType='ENTRY')),
-                total_sales=Sum('modifiedStock', filter=Q(modificationType='EXIT')),
-                total_movements=Count('id')
+                total_entries=Sum('quantity', filter=Q(modificationType='ENTRY')),
+                total_sales=Sum('quantity', filter=Q(modificationType='EXIT')),
+                total_movements=Sum('movement_count')
             )
             
             entries = movements_stats['total_entries'] or 0
@@ -474,7 +541,7 @@ class SupplyMovementsVolumeView(StatisticsBaseView):
             }
             
           
-            cache.set(cache_key, response_data, 30)
+            set_cached_stats(cache_key, response_data)
             
             return Response(response_data)
             
@@ -485,9 +552,88 @@ class SupplyMovementsVolumeView(StatisticsBaseView):
             return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@stats_conditional_get
 class CategoryDistributionView(StatisticsBaseView):
     
     
+    def build_response(self, item_type, metric):
+        if item_type == 'products':
+            # Categorías agrupadas a través del M2M Product.category
+            groups = Category.objects.filter(status=True)
+            active_items = Q(products__status=True)
+            stock_field = 'products__stock'
+            price_field = 'products__price'
+            movements = DailyMovementRollup.objects.filter(
+                product__category=OuterRef('pk'),
+                product__status=True
+            ).values('product__category')
+        else:
+            # Los insumos no tienen categoría: se agrupan por proveedor
+            groups = Supplier.objects.filter(status=True)
+            active_items = Q(supplies__status=True)
+            stock_field = 'supplies__stock'
+            price_field = 'supplies__unitaryPrice'
+            movements = DailyMovementRollup.objects.filter(
+                supply__supplier=OuterRef('pk'),
+                supply__status=True
+            ).values('supply__supplier')
+
+        groups = groups.annotate(
+            total_stock=Coalesce(Sum(stock_field, filter=active_items), 0),
+            total_value=Coalesce(
+                Sum(F(price_field) * F(stock_field), filter=active_items),
+                Value(Decimal('0')),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            )
+        ).order_by('id')
+
+        if metric == 'movements':
+            groups = groups.annotate(
+                total_movements=Coalesce(
+                    Subquery(
+                        movements.annotate(total=Sum('movement_count')).values('total'),
+                        output_field=IntegerField()
+                    ),
+                    0
+                )
+            )
+
+        data = [
+            {
+                'category_id': group.id,
+                'category_name': group.name,
+                'total_stock': group.total_stock,
+                'total_value': float(group.total_value),
+                'total_movements': getattr(group, 'total_movements', 0),
+                'percentage': 0
+            }
+            for group in groups
+        ]
+
+        if data:
+            if metric == 'stock':
+                total_metric = sum(item['total_stock'] for item in data)
+            elif metric == 'value':
+                total_metric = sum(item['total_value'] for item in data)
+            else:  
+                total_metric = sum(item['total_movements'] for item in data)
+
+            if total_metric > 0:
+                for item in data:
+                    if metric == 'stock':
+                        item['percentage'] = round((item['total_stock'] / total_metric) * 100, 2)
+                    elif metric == 'value':
+                        item['percentage'] = round((item['total_value'] / total_metric) * 100, 2)
+                    else: 
+                        item['percentage'] = round((item['total_movements'] / total_metric) * 100, 2)
+
+        response_data = {
+            'data': data,
+            'total_categories': len(data),
+            'metric': metric
+        }
+        return response_data
+
     def get(self, request):
         try:
             item_type = request.GET.get('type', 'products')  # 'products' o 'supplies'
@@ -500,106 +646,108 @@ class CategoryDistributionView(StatisticsBaseView):
                 raise ValidationError("Métrica debe ser 'stock', 'value' o 'movements'")
             
            
-            cache_key = f"category_distribution_{item_type}_{metric}_{request.user.id}"
+            cache_key = stats_cache_key('category_distribution', item_type, metric)
             
            
-            cached_data = cache.get(cache_key)
-            if cached_data:
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
                 return Response(cached_data)
             
-            data = []
+            response_data = self.build_response(item_type, metric)
             
-            if item_type == 'products':
-                
-                categories = Category.objects.filter(status=True).prefetch_related('products')
-                
-                for category in categories:
-                    products = category.products.filter(status=True)
-                    
-                    if metric == 'stock':
-                        total_stock = sum(product.stock for product in products)
-                        total_value = sum(float(product.price * product.stock) for product in products)
-                    elif metric == 'value':
-                        total_stock = sum(product.stock for product in products)
-                        total_value = sum(float(product.price * product.stock) for product in products)
-                    else:  
-                        total_stock = sum(product.stock for product in products)
-                        total_value = sum(float(product.price * product.stock) for product in products)
-                    
-                   
-                    total_movements = 0
-                    if metric == 'movements':
-                        total_movements = ProductMovement.objects.filter(
-                            product__in=products,
-                            status=True
-                        ).count()
-                    
-                    data.append({
-                        'category_id': category.id,
-                        'category_name': category.name,
-                        'total_stock': total_stock,
-                        'total_value': total_value,
-                        'total_movements': total_movements,
-                        'percentage': 0  
-                    })
+            set_cached_stats(cache_key, response_data)
             
-            else:  
-                categories = Category.objects.filter(status=True)
-                
-                for category in categories:
-                    
-                    products = category.products.filter(status=True)
-                    
-                   
-                    total_stock = 0
-                    total_value = 0
-                    total_movements = 0
-                    
-                    if metric == 'movements':
-                        total_movements = SupplyMovement.objects.filter(
-                            status=True
-                        ).count()
-                    
-                    data.append({
-                        'category_id': category.id,
-                        'category_name': category.name,
-                        'total_stock': total_stock,
-                        'total_value': total_value,
-                        'total_movements': total_movements,
-                        'percentage': 0 
-                    })
-            
-
-            if data:
-                if metric == 'stock':
-                    total_metric = sum(item['total_stock'] for item in data)
-                elif metric == 'value':
-                    total_metric = sum(item['total_value'] for item in data)
-                else:  
-                    total_metric = sum(item['total_movements'] for item in data)
-                
-                if total_metric > 0:
-                    for item in data:
-                        if metric == 'stock':
-                            item['percentage'] = round((item['total_stock'] / total_metric) * 100, 2)
-                        elif metric == 'value':
-                            item['percentage'] = round((item['total_value'] / total_metric) * 100, 2)
-                        else: 
-                            item['percentage'] = round((item['total_movements'] / total_metric) * 100, 2)
+            return Response(response_data)
+            
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Error en CategoryDistributionView: {str(e)}")
+            return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@stats_conditional_get
+class DashboardView(StatisticsBaseView):
+    """
+    Todos los KPIs del dashboard en un solo request y una sola entrada de
+    cache: totales de inventario, volumen de movimientos de productos e
+    insumos, tops, movimientos mensuales y distribución por categoría.
+    """
+    
+    def get_movements_volume(self, rollup_start):
+        # Productos e insumos en una sola consulta con Sum condicionales; los
+        # tipos son los mismos que usan ProductMovementsVolumeView y SupplyMovementsVolumeView
+        products = Q(product__isnull=False)
+        supplies = Q(supply__isnull=False)
+        volume = DailyMovementRollup.objects.filter(
+            day__gte=rollup_start
+        ).aggregate(
+            product_entries=Sum('quantity', filter=products & Q(modificationType='Entrada')),
+            product_sales=Sum('quantity', filter=products & Q(modificationType='Salida')),
+            product_movements=Sum('movement_count', filter=products),
+            supply_entries=Sum('quantity', filter=supplies & Q(modificationType='ENTRY')),
+            supply_sales=Sum('quantity', filter=supplies & Q(modificationType='EXIT')),
+            supply_movements=Sum('movement_count', filter=supplies)
+        )
+        
+        result = {}
+        for prefix in ('product', 'supply'):
+            entries = volume[f'{prefix}_entries'] or 0
+            sales = volume[f'{prefix}_sales'] or 0
+            result[f'{prefix}_movements_volume'] = {
+                'entries': entries,
+                'sales': sales,
+                'net_movement': entries - sales,
+                'total_movements': volume[f'{prefix}_movements'] or 0
+            }
+        return result
+    
+    def get(self, request):
+        try:
+            limit = self.validate_limit(request.GET.get('limit', 5))
+            period = request.GET.get('period', '30d')
+            self.validate_period(period)
+            year = int(request.GET.get('year', timezone.now().year))
+            
+            if year < 2020 or year > timezone.now().year + 1:
+                raise ValidationError("Año inválido")
+            
+            cache_key = stats_cache_key('dashboard', period, limit, year)
+            
+            cached_data = get_cached_stats(cache_key)
+            if cached_data is not None:
+                return Response(cached_data)
+            
+            # Un solo cálculo del rango de fechas para todas las secciones
+            rollup_start = self.get_rollup_start(period)
+            totals = get_totals()
             
             response_data = {
-                'data': data,
-                'total_categories': len(data),
-                'metric': metric
+                'period': period,
+                'year': year,
+                'totals': {
+                    'total_products': totals.product_count,
+                    'total_stock_value': totals.product_stock_value,
+                    'total_supplies': totals.supply_count,
+                    'total_inventory_value': totals.supply_stock_value
+                },
+                **self.get_movements_volume(rollup_start),
+                'top_products_sales': TopProductsSalesView().build_response(period, limit, rollup_start)['data'],
+                'top_products_entries': TopProductsEntriesView().build_response(period, limit, rollup_start)['data'],
+                'top_supplies_sales': TopSuppliesSalesView().build_response(period, limit, rollup_start)['data'],
+                'top_supplies_entries': TopSuppliesEntriesView().build_response(period, limit, rollup_start)['data'],
+                'monthly_movements': MonthlyMovementsView().build_response(year, 'both', 'month'),
+                'category_distribution': CategoryDistributionView().build_response('products', 'stock')
             }
             
-          
-            cache.set(cache_key, response_data, 100)
+            set_cached_stats(cache_key, response_data)
             
             return Response(response_data)
             
+        except (ValueError, TypeError):
+            return Response({'error': 'Parámetros inválidos'}, status=status.HTTP_400_BAD_REQUEST)
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error en CategoryDistributionView: {str(e)}")
-            return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            logger.error(f"Error en DashboardView: {str(e)}")
+            return Response({'error': 'Error interno del servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
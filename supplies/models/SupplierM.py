@@ -1,4 +1,6 @@
 from django.db import models
+from picm_rest import versions
+from picm_rest.versions import VersionedQuerySet
 from django.db.models import F, Sum
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
@@ -6,6 +8,9 @@ from django.core.exceptions import ValidationError
 
 # Supplier Model
 class Supplier(models.Model):
+    version_table = versions.SUPPLIERS
+    objects = VersionedQuerySet.as_manager()
+
     name = models.CharField(max_length=30)
     nit = models.CharField(
         max_length=12,
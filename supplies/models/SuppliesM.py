@@ -1,9 +1,14 @@
 from django.db import models
+from picm_rest import versions
+from picm_rest.versions import VersionedQuerySet
 from django.db.models import F, Sum
 from supplies.models.SupplierM import Supplier
 from django.core.validators import RegexValidator
 
 class Supplies(models.Model):
+    version_table = versions.SUPPLIES
+    objects = VersionedQuerySet.as_manager()
+
     name = models.CharField(max_length=30)
     description = models.CharField(max_length=70) 
     unitaryPrice = models.DecimalField(
@@ -1,3 +1,43 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from stats.totals import compute_totals, get_totals
+from .models import Supplier, Supplies
+
+
+class DeleteSupplierTotalsTests(TestCase):
+    """Borrar un proveedor elimina sus insumos por CASCADE: los totales deben acompañar."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('supplies_tester', password='x'))
+        self.supplier = Supplier.objects.create(
+            name='Proveedor', nit='900123456-7', phone='6012345678',
+            email='proveedor@picm.com', address='Calle 1'
+        )
+        Supplies.objects.create(
+            name='Tornillo', description='Insumo de prueba', unitaryPrice='10.00', stock=5, supplier=self.supplier
+        )
+        other = Supplier.objects.create(
+            name='Otro', nit='900123457-7', phone='6012345679',
+            email='otro@picm.com', address='Calle 2'
+        )
+        Supplies.objects.create(
+            name='Tuerca', description='Insumo de prueba', unitaryPrice='2.00', stock=3, supplier=other
+        )
+        # La fila de totales se crea desde los agregados en la primera lectura
+        totals = get_totals()
+        self.assertEqual((totals.supply_count, totals.supply_stock_value), (2, Decimal('56.00')))
+
+    def test_delete_supplier_subtracts_its_supplies(self):
+        response = self.client.delete(f'/api/supplies/delete-supplier/{self.supplier.id}')
+        self.assertEqual(response.status_code, 200)
 
-# Create your tests here.
+        totals = get_totals()
+        actual = compute_totals()
+        self.assertEqual(totals.supply_count, actual['supply_count'])
+        self.assertEqual(totals.supply_stock_value, actual['supply_stock_value'])
+        self.assertEqual((totals.supply_count, totals.supply_stock_value), (1, Decimal('6.00')))
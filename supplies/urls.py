@@ -5,11 +5,13 @@ urlpatterns = [
     #  Supplies URLs
     path('get-paginated', get_supplies, name='get_supplies'),
     path('get-supplies-name', get_supplies_name, name='get_supplies_name'), 
+    path('autocomplete', autocomplete_supplies, name='supplies_autocomplete'),
     path('create', create_supply, name='create_supply'),
     path('total-stock', get_supply_total_stock, name='get_supply_total_stock'),
     path('total-inventory-value', get_supply_total_inventory_value, name='get_supply_total_inventory_value'),
     path('delete/<int:supply_id>', delete_supply, name='delete_supply'),
     path('update/<int:supply_id>', edit_supply, name='update_supply'),
+    path('update-stock/bulk', update_supply_stock_bulk, name='update_supply_stock_bulk'),
     path('update-stock/<int:supply_id>', update_supply_stock, name='update_supply_stock'),
     path('get/<int:supply_id>', get_supply, name='get_supply'),
 
@@ -1,10 +1,17 @@
+import copy
 from rest_framework.decorators import api_view  
 from rest_framework.response import Response
 from rest_framework import status
+from picm_rest.conditional import conditional_get
+from picm_rest import versions
 from rest_framework.pagination import PageNumberPagination
+from django.db import transaction
 from .models.SupplierM import Supplier
 from .models.SuppliesM import Supplies
-from movements.models import SupplyMovement
+from search.backends import search_queryset
+from search.autocomplete import autocomplete, parse_limit
+from stats.totals import apply_totals, contribution, get_totals, record_item_change
+from movements.stock import adjust_stock, adjust_stock_bulk, set_stock, InsufficientStock, BULK_MAX_ITEMS
 
 class StandardResultsSetPagination(PageNumberPagination):
 
@@ -15,16 +22,13 @@ class StandardResultsSetPagination(PageNumberPagination):
 
 ## Supply Views
 
+@conditional_get(versions.SUPPLIES, versions.SUPPLIERS)
 def get_supplies(request):
     try:
+        supplies = Supplies.objects.filter(status=1)
         if 'search' in request.query_params:
-            search_term = request.GET['search']
-            supplies = Supplies.objects.filter(
-                status=1,
-                name__icontains=search_term
-            )
-        else:
-            supplies = Supplies.objects.filter(status=1)
+            # Resultados ordenados por relevancia; 'filter' reemplaza ese orden
+            supplies = search_queryset(supplies, request.GET['search'])
         
         supplier_name = request.query_params.get('supplier')
         sort_by = request.query_params.get('filter')
@@ -57,6 +61,7 @@ def get_supplies(request):
         )
 
 @api_view(['GET'])
+@conditional_get(versions.SUPPLIES, versions.SUPPLIERS)
 def get_supply(request, supply_id):
     try:
         supply = Supplies.objects.get(id=supply_id, status=1)
@@ -81,16 +86,28 @@ def get_supply(request, supply_id):
         )
 
 @api_view(['GET'])
+@conditional_get(versions.SUPPLIES)
 def get_supplies_name(request):
     try:
-        supply = Supplies.objects.filter(status=1)
-        data = [s.name for s in supply]
+        data = list(Supplies.objects.filter(status=1).values_list('name', flat=True))
         return Response(data, status=status.HTTP_200_OK)
     except Exception as e:
         return Response(
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+@api_view(['GET'])
+@conditional_get(versions.SUPPLIES)
+def autocomplete_supplies(request):
+    try:
+        names = autocomplete(Supplies, request.GET.get('q', ''), parse_limit(request.GET.get('limit')))
+        return Response(names, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 @api_view(['POST'])
 def create_supply(request):
     try:
@@ -100,12 +117,14 @@ def create_supply(request):
         unitaryPrice = data.get('precio_unitario')
         supplier_name = data.get('proveedor')
         supplier = Supplier.objects.filter(name=supplier_name).first()
-        new_supply = Supplies.objects.create(
-            name=name,
-            description=description,
-            unitaryPrice=unitaryPrice,
-            supplier=supplier
-        )
+        with transaction.atomic():
+            new_supply = Supplies.objects.create(
+                name=name,
+                description=description,
+                unitaryPrice=unitaryPrice,
+                supplier=supplier
+            )
+            record_item_change(None, new_supply)
         return Response({'message': 'El insumo creado exitosamente'},status=status.HTTP_201_CREATED
         )
     except Supplier.DoesNotExist:
@@ -123,19 +142,22 @@ def create_supply(request):
 def edit_supply(request, supply_id):
     try:
         data = request.data
-        supply = Supplies.objects.get(id=supply_id)
+        with transaction.atomic():
+            supply = Supplies.objects.select_for_update().get(id=supply_id)
+            previous = copy.copy(supply)
 
-        supply.name = data.get('nombre', supply.name)
-        supply.description = data.get('descripcion', supply.description)
-        supply.unitaryPrice = data.get('precio_unitario', supply.unitaryPrice)
-        supply.stock = data.get('stock', supply.stock)
+            supply.name = data.get('nombre', supply.name)
+            supply.description = data.get('descripcion', supply.description)
+            supply.unitaryPrice = data.get('precio_unitario', supply.unitaryPrice)
+            supply.stock = data.get('stock', supply.stock)
 
-        supplier_name = data.get('proveedor')
-        if supplier_name:
-            supplier = Supplier.objects.get(name=supplier_name)
-            supply.supplier = supplier
+            supplier_name = data.get('proveedor')
+            if supplier_name:
+                supplier = Supplier.objects.get(name=supplier_name)
+                supply.supplier = supplier
 
-        supply.save()
+            supply.save()
+            record_item_change(previous, supply)
         return Response({'message': 'Insumo actualizado exitosamente'}, status=status.HTTP_200_OK)
     except Supplies.DoesNotExist:
         return Response(
@@ -153,10 +175,30 @@ def edit_supply(request, supply_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR    
         )
 
+@api_view(['POST'])
+def update_supply_stock_bulk(request):
+    try:
+        entries = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(entries, list) or not entries:
+            return Response({"error": "Debe enviar una lista 'items' con elementos {id, delta, comentary}"}, status=400)
+        if len(entries) > BULK_MAX_ITEMS:
+            return Response({"error": f"Máximo {BULK_MAX_ITEMS} elementos por solicitud"}, status=400)
+
+        results = adjust_stock_bulk(Supplies, entries, request.user)
+        applied = sum(1 for result in results if result["status"] == "ok")
+        return Response({
+            "message": "Ajuste masivo de stock procesado",
+            "applied": applied,
+            "failed": len(results) - applied,
+            "results": results
+        }, status=200)
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
 @api_view(['PUT'])
 def update_supply_stock(request, supply_id):
     try:
-        supply = Supplies.objects.get(id=supply_id, status='1')
         data = request.data
         increase = request.query_params.get('increase') == 'true'
         decrease = request.query_params.get('decrease') == 'true'
@@ -168,32 +210,17 @@ def update_supply_stock(request, supply_id):
         if increase:
             if(int(stock) < 0):
                 return Response({"error": "El stock a aumentar debe ser mayor que 0"}, status=400)
-            supply.stock += int(stock)
-            supply.save()
-            SupplyMovement.objects.create(
-                user=request.user,
-                user_name=request.user.username,
-                supply=supply,
-                supply_name=supply.name,
-                modificationType='Entrada',
-                modifiedStock=int(stock)
-            )
-            return Response({"message": "Stock aumentado", "stock": supply.stock}, status=200)
+            new_stock, _ = adjust_stock(Supplies, supply_id, int(stock), request.user)
+            return Response({"message": "Stock aumentado", "stock": new_stock}, status=200)
 
         if decrease:
             if(int(stock) < 0):
                 return Response({"error": "El stock a disminuir debe ser mayor que 0"}, status=400)
-            supply.stock -= int(stock)
-            supply.save()
-            SupplyMovement.objects.create(
-                user=request.user,
-                user_name=request.user.username,
-                supply=supply,
-                supply_name=supply.name,
-                modificationType='Salida',
-                modifiedStock=int(stock)
-            )
-            return Response({"message": "Stock disminuido", "stock": supply.stock}, status=200)
+            try:
+                new_stock, _ = adjust_stock(Supplies, supply_id, -int(stock), request.user)
+            except InsufficientStock as e:
+                return Response({"error": str(e)}, status=400)
+            return Response({"message": "Stock disminuido", "stock": new_stock}, status=200)
 
         # Si no viene increase/decrease, usar stock directo:
         stock = request.data.get('stock')
@@ -202,9 +229,8 @@ def update_supply_stock(request, supply_id):
         if int(stock) < 0:
             return Response({"error": "Stock no puede ser negativo"}, status=400)
 
-        supply.stock = int(stock)
-        supply.save()
-        return Response({"message": "Stock actualizado", "stock": supply.stock}, status=200)
+        new_stock = set_stock(Supplies, supply_id, int(stock))
+        return Response({"message": "Stock actualizado", "stock": new_stock}, status=200)
 
     except Supplies.DoesNotExist:
         return Response({"error": "Insumo no encontrado"}, status=404)
@@ -214,9 +240,12 @@ def update_supply_stock(request, supply_id):
 @api_view(['DELETE'])
 def delete_supply(request, supply_id):
     try:
-        supply = Supplies.objects.get(id=supply_id)
-        supply.status = False
-        supply.save()
+        with transaction.atomic():
+            supply = Supplies.objects.select_for_update().get(id=supply_id)
+            previous = copy.copy(supply)
+            supply.status = False
+            supply.save()
+            record_item_change(previous, supply)
         return Response({'message': 'Insumo eliminado exitosamente'}, status=status.HTTP_200_OK)
     except Supplies.DoesNotExist:
         return Response(
@@ -230,9 +259,10 @@ def delete_supply(request, supply_id):
         )
 
 @api_view(['GET'])
+@conditional_get(versions.SUPPLIES)
 def get_supply_total_stock(request):
     try:
-        total_stock = Supplies.calculate_total_supplies()
+        total_stock = get_totals().supply_count
         return Response(
             {'total_stock': total_stock},
             status=status.HTTP_200_OK
@@ -244,9 +274,10 @@ def get_supply_total_stock(request):
         )
 
 @api_view(['GET'])
+@conditional_get(versions.SUPPLIES)
 def get_supply_total_inventory_value(request):
     try:
-        total_value = Supplies.calculate_total_inventory_value()
+        total_value = get_totals().supply_stock_value
         return Response(
             {'total_inventory_value': total_value},
             status=status.HTTP_200_OK
@@ -260,6 +291,7 @@ def get_supply_total_inventory_value(request):
 ## Supplier Views
 
 @api_view(['GET'])
+@conditional_get(versions.SUPPLIERS)
 def get_suppliers(request):
     try:
         suppliers = Supplier.objects.all()
@@ -277,6 +309,7 @@ def get_suppliers(request):
         )
     
 @api_view(['GET'])
+@conditional_get(versions.SUPPLIERS)
 def get_suppliers_paginated(request):
     try:
         if 'search' in request.query_params:
@@ -310,6 +343,7 @@ def get_suppliers_paginated(request):
         )
     
 @api_view(['GET'])
+@conditional_get(versions.SUPPLIERS)
 def get_supplier_by_id(request, supplier_id):
     try:
         supplier = Supplier.objects.get(id=supplier_id)
@@ -380,8 +414,17 @@ def edit_supplier(request, supplier_id):
 @api_view(['DELETE'])
 def delete_supplier(request, supplier_id):
     try:
-        supplier = Supplier.objects.get(id=supplier_id)
-        supplier.delete()
+        with transaction.atomic():
+            supplier = Supplier.objects.get(id=supplier_id)
+            # El CASCADE borra los insumos del proveedor sin pasar por
+            # record_item_change: su aporte se descuenta de los totales a mano
+            count, value = 0, 0
+            for supply in supplier.supplies.select_for_update():
+                supply_count, supply_value = contribution(supply)
+                count += supply_count
+                value += supply_value
+            apply_totals(Supplies, -count, -value)
+            supplier.delete()
         return Response({'message': 'Proveedor eliminado exitosamente'}, status=status.HTTP_200_OK)
     except Supplier.DoesNotExist:
         return Response(